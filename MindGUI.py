@@ -1,10 +1,11 @@
 import gradio as gr
 import json
-from openai import OpenAI
 import os
 import logging
 from dotenv import load_dotenv
 from src.json_2_video_engine.json_2_video import PyJson2Video  # Import the process_video function
+from src.llm.gateway import gateway
+from src.json_2_video_engine.utils.json_repair import repair_video_json
 import asyncio
 import uuid
 
@@ -16,9 +17,6 @@ load_dotenv()
 with open('src/json_2_video/tests/json2video_template_clean.json', 'r') as f:
     reference_json = json.load(f)
 
-# Initialize the OpenAI client
-openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-
 def generate_from_json(json_input):
     try:
         output_filename = f"output_{uuid.uuid4()}.mp4"
@@ -43,7 +41,8 @@ def generate_and_process_video(instructions):
             {"role": "user", "content": f"Please generate a similar JSON structure based on the following instructions:\n\n{instructions}"}
         ]
 
-        response = openai.chat.completions.create(
+        response = gateway.chat_sync(
+            cache=False,  # a new video every time
             model="gpt-3.5-turbo-0125",
             messages=messages,
             max_tokens=2000,
@@ -72,17 +71,28 @@ def generate_and_process_video(instructions):
 def json_verification(json_data):
     try:
         parsed_json = json.loads(json_data) if isinstance(json_data, str) else json_data
+
+        # Only ask the model when the local checks can't repair the JSON
+        report = repair_video_json(parsed_json)
+        if report['valid']:
+            return {"status": "corrected", "message": "JSON structure corrected.", "data": report['data']}
+        logging.warning(f"JSON could not be repaired locally ({'; '.join(report['errors'])}), asking the model to verify it")
+        parsed_json = report['data']
+        known_errors = "\n".join(f"        - {error}" for error in report['errors'])
+
         verification_prompt = f"""
         Please verify the following JSON structure for a video creation template:
         1. Ensure all required elements (images, text, script) are present.
         2. Verify that the timing is correct and synchronized.
         3. Check that image and text timings use script_id references (e.g., 'script_id.start_time', 'script_id.end_time') instead of hard-coded numbers.
         4. Validate that the script is at least 100 words long.
+        The JSON structure was already checked and these problems are still left. Fix them and keep everything else as it is:
+{known_errors}
         Reference JSON structure:\n{json.dumps(reference_json, indent=2)}
         JSON structure to verify:\n{json.dumps(parsed_json, indent=2)}
         """
 
-        verification = openai.chat.completions.create(
+        verification = gateway.chat_sync(
             model="gpt-3.5-turbo-0125",
             messages=[
                 {"role": "system", "content": "You are an AI assistant specialized in verifying JSON structures for video creation."},
@@ -92,6 +102,7 @@ def json_verification(json_data):
             max_tokens=2000,
             n=1,
             temperature=0.3,
+            validate=lambda content: json.loads(content)["status"],
         )
         
         verification_result = json.loads(verification.choices[0].message.content)
@@ -0,0 +1,80 @@
+import bisect
+import logging
+
+import numpy as np
+from moviepy.editor import VideoClip
+
+from .text_renderer import text_renderer
+
+
+class CaptionTrack(VideoClip):
+    """All captions of a transcript as a single clip.
+
+    Cue start/end times are kept in sorted arrays and the cue showing at t is found by
+    binary search, so the compositor sees one layer however long the transcript is. Each
+    cue is rasterized through text_renderer and the frames of the current cue are reused
+    until the next one starts.
+
+    Cue bitmaps are centered horizontally and top aligned inside the track, which is sized
+    to the largest cue; positioning the track places every cue the way a per-cue clip
+    with the same position would be placed.
+
+    Args:
+        cues (list): (start_seconds, end_seconds, text) tuples, not overlapping (as in an SRT
+            transcript).
+        render_args (dict): Keyword arguments for text_renderer.render.
+    """
+
+    def __init__(self, cues: list, render_args: dict):
+        cues = sorted((float(start), float(end), text) for start, end, text in cues if end > start)
+        self.starts = [start for start, _, _ in cues]
+        self.ends = [end for _, end, _ in cues]
+        self.texts = [text for _, _, text in cues]
+        self.render_args = render_args
+        self._current = (None, None)
+
+        bitmaps = [text_renderer.render(text, **render_args) for text in self.texts]
+        width = max((bitmap.shape[1] for bitmap in bitmaps), default=1)
+        height = max((bitmap.shape[0] for bitmap in bitmaps), default=1)
+        self._blank = (np.zeros((height, width, 3), dtype=np.uint8), np.zeros((height, width), dtype=float))
+
+        VideoClip.__init__(self, make_frame=lambda t: self.frame_at(t)[0])
+        self.size = (width, height)
+        self.duration = self.end = self.ends[-1] if cues else 0
+        self.mask = VideoClip(make_frame=lambda t: self.frame_at(t)[1], ismask=True)
+        self.mask.size, self.mask.duration, self.mask.end = self.size, self.duration, self.end
+
+        logging.info(f"Caption track built with {len(cues)} cues")
+
+    def cue_index(self, t: float):
+        """Index of the cue showing at t, or None."""
+        index = bisect.bisect_right(self.starts, t) - 1
+        if index >= 0 and t < self.ends[index]:
+            return index
+        return None
+
+    def frame_key(self, t: float):
+        """What is on screen at t, for the compositor's static-frame reuse (-1 when no cue shows)."""
+        index = self.cue_index(t)
+        return -1 if index is None else index
+
+    def frame_at(self, t: float) -> tuple:
+        """(rgb, mask) frames at t."""
+        index = self.cue_index(t)
+        if index is None:
+            return self._blank
+        # Frames are read in order, so keeping the current cue is enough
+        if self._current[0] != index:
+            self._current = (index, self._cue_frames(self.texts[index]))
+        return self._current[1]
+
+    def _cue_frames(self, text: str) -> tuple:
+        bitmap = text_renderer.render(text, **self.render_args)
+        height, width = bitmap.shape[:2]
+        x = (self._blank[0].shape[1] - width) // 2
+
+        rgb = self._blank[0].copy()
+        mask = self._blank[1].copy()
+        rgb[:height, x:x + width] = bitmap[:, :, :3]
+        mask[:height, x:x + width] = bitmap[:, :, 3] / 255.0
+        return rgb, mask
@@ -2,13 +2,12 @@ import logging
 import os
 import pysrt
 import uuid
-from openai import OpenAI
 
 from .utils import convert_seconds_to_srt_time
+from ..llm.gateway import gateway
 
 class SubtitleGenerator:
     def __init__(self):
-        self.openai = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.convert_seconds_to_srt_time = convert_seconds_to_srt_time
         self.base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -33,9 +32,10 @@ class SubtitleGenerator:
 
     async def speech_to_text(self, audio_file: str):
         try:
-            audio_file = open(audio_file, "rb")  # Open the audio file
-            transcript = self.openai.audio.transcriptions.create(  # Use OpenAI's transcription method
-                file=audio_file,
+            with open(audio_file, "rb") as f:  # Read once, so a retried upload can resend it
+                audio = (os.path.basename(audio_file), f.read())
+            transcript = await gateway.transcribe(
+                file=audio,
                 model="whisper-1",
                 response_format="verbose_json",
                 timestamp_granularities=["word"]
@@ -101,9 +101,10 @@ class SubtitleGenerator:
 
     async def speech_to_text_for_translation(self, audio_file):
         try:
-            audio_file = open(audio_file, "rb")  # Open the audio file
-            transcript = self.openai.audio.transcriptions.create(  # Use OpenAI's transcription method
-                file=audio_file,
+            with open(audio_file, "rb") as f:  # Read once, so a retried upload can resend it
+                audio = (os.path.basename(audio_file), f.read())
+            transcript = await gateway.transcribe(
+                file=audio,
                 model="whisper-1",
                 response_format="verbose_json",
                 timestamp_granularities=["word"]
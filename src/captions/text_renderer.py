@@ -0,0 +1,164 @@
+import os
+import logging
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+from moviepy.editor import ImageClip
+
+FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+FALLBACK_FONTS = ("DejaVuSans.ttf", "Arial.ttf", "arial.ttf")
+
+
+def _rgba(color) -> tuple:
+    if color is None or color == 'transparent':
+        return (0, 0, 0, 0)
+    if isinstance(color, (list, tuple)):
+        return tuple(color) + (255,) * (4 - len(color))
+    return ImageColor.getcolor(color, 'RGBA')
+
+
+class TextRenderer:
+    """In-process text rasterizer (FreeType through Pillow) replacing ImageMagick's TextClip.
+
+    Supports wrapping to a box width, alignment, stroke, drop shadow and a background colour.
+    Laid-out line bitmaps are cached per (font, size, colour, stroke) and finished blocks in a
+    small LRU, so repeated captions and cards are rendered once.
+    """
+
+    def __init__(self, block_cache_size: int = 512):
+        self.block_cache_size = block_cache_size
+        self._blocks = OrderedDict()
+
+    @lru_cache(maxsize=64)
+    def font(self, font: str, size: int):
+        """Resolve a font path, a bundled font name (captions/fonts) or a system font name."""
+        candidates = []
+        if font:
+            candidates += [font, os.path.join(FONTS_DIR, font)]
+            if not os.path.splitext(font)[1]:
+                candidates += [f"{font}.ttf", f"{font}.otf", os.path.join(FONTS_DIR, f"{font}.ttf")]
+        candidates += list(FALLBACK_FONTS)
+
+        for candidate in candidates:
+            try:
+                return ImageFont.truetype(candidate, size)
+            except OSError:
+                continue
+
+        logging.warning(f"Font {font} not found. Using Pillow's default font.")
+        try:
+            return ImageFont.load_default(size=size)
+        except TypeError:
+            return ImageFont.load_default()
+
+    @lru_cache(maxsize=4096)
+    def wrap(self, text: str, font: str, size: int, max_width: int = None) -> tuple:
+        """Split text into lines no wider than max_width (explicit newlines are kept)."""
+        pil_font = self.font(font, size)
+        lines = []
+        for paragraph in text.split('\n'):
+            line = ''
+            for word in paragraph.split():
+                candidate = f"{line} {word}" if line else word
+                if max_width is None or not line or pil_font.getlength(candidate) <= max_width:
+                    line = candidate
+                else:
+                    lines.append(line)
+                    line = word
+            lines.append(line)
+        return tuple(lines)
+
+    @lru_cache(maxsize=4096)
+    def line_bitmap(self, line: str, font: str, size: int, color, stroke_color=None, stroke_width: int = 0) -> Image.Image:
+        """RGBA bitmap of one laid-out line, stroke included."""
+        pil_font = self.font(font, size)
+        ascent, descent = pil_font.getmetrics()
+        width = int(np.ceil(pil_font.getlength(line))) + 2 * stroke_width
+        height = ascent + descent + 2 * stroke_width
+
+        image = Image.new('RGBA', (max(width, 1), max(height, 1)), (0, 0, 0, 0))
+        ImageDraw.Draw(image).text(
+            (stroke_width, stroke_width),
+            line,
+            font=pil_font,
+            fill=_rgba(color),
+            stroke_width=stroke_width,
+            stroke_fill=_rgba(stroke_color) if stroke_color else None
+        )
+        return image
+
+    def _block(self, lines, font, size, color, stroke_color, stroke_width, width, height, align, line_spacing) -> Image.Image:
+        bitmaps = [self.line_bitmap(line, font, size, color, stroke_color, stroke_width) for line in lines]
+        line_height = int(round(max(bitmap.height for bitmap in bitmaps) * line_spacing))
+        content_height = line_height * (len(bitmaps) - 1) + bitmaps[-1].height
+        block_width = width or max(bitmap.width for bitmap in bitmaps)
+        block_height = height or content_height
+
+        block = Image.new('RGBA', (block_width, block_height), (0, 0, 0, 0))
+        # Vertically centered when the box height is fixed, like ImageMagick's gravity center
+        y = max((block_height - content_height) // 2, 0) if height else 0
+        for bitmap in bitmaps:
+            if align == 'left':
+                x = 0
+            elif align == 'right':
+                x = block_width - bitmap.width
+            else:
+                x = (block_width - bitmap.width) // 2
+            block.alpha_composite(bitmap, (max(x, 0), y))
+            y += line_height
+        return block
+
+    def render(self, text: str, font: str = None, fontsize: float = 48, color='white', size: tuple = (None, None),
+               align: str = 'center', stroke_color=None, stroke_width: float = 0, shadow_color=None,
+               shadow_offset: float = 0, bg_color=None, line_spacing: float = 1.0) -> np.ndarray:
+        """Render text to an HxWx4 uint8 RGBA array.
+
+        Args:
+            size (tuple): (width, height) of the box. A None width sizes the box to the text, a
+                width wraps the text to it, a None height fits the content.
+            shadow_offset (float): Offset in pixels of the drop shadow drawn in shadow_color.
+        """
+        width = int(size[0]) if size and size[0] else None
+        height = int(size[1]) if size and size[1] else None
+        size_px = max(int(round(fontsize)), 1)
+        stroke_px = int(round(stroke_width)) if stroke_color else 0
+        shadow_px = int(round(shadow_offset)) if shadow_color else 0
+        # Normalized colours keep the cache keys hashable (JSON colours may be lists)
+        color = _rgba(color)
+        stroke_color = _rgba(stroke_color) if stroke_color else None
+        shadow_color = _rgba(shadow_color) if shadow_color else None
+        bg_color = _rgba(bg_color)
+
+        key = (text, font, size_px, color, width, height, align, stroke_color, stroke_px, shadow_color, shadow_px, bg_color, line_spacing)
+        cached = self._blocks.get(key)
+        if cached is not None:
+            self._blocks.move_to_end(key)
+            return cached
+
+        lines = self.wrap(text, font, size_px, width - 2 * stroke_px if width else None)
+        block = self._block(lines, font, size_px, color, stroke_color, stroke_px, width, height, align, line_spacing)
+
+        canvas = Image.new('RGBA', (block.width + shadow_px, block.height + shadow_px), bg_color)
+        if shadow_px:
+            shadow = self._block(lines, font, size_px, shadow_color, None, stroke_px, width, height, align, line_spacing)
+            canvas.alpha_composite(shadow, (shadow_px, shadow_px))
+        canvas.alpha_composite(block, (0, 0))
+
+        frame = np.array(canvas)
+        self._blocks[key] = frame
+        if len(self._blocks) > self.block_cache_size:
+            self._blocks.popitem(last=False)
+        return frame
+
+    def text_clip(self, text: str, **kwargs) -> ImageClip:
+        """ImageClip of the rendered text, with a mask unless the box is fully opaque."""
+        frame = self.render(text, **kwargs)
+        if frame[:, :, 3].min() == 255:
+            return ImageClip(frame[:, :, :3])
+        return ImageClip(frame)
+
+
+# Shared instance used by captions, json2video text layers and the hook / question cards
+text_renderer = TextRenderer()
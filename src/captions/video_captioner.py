@@ -1,8 +1,10 @@
-from moviepy.editor import TextClip, CompositeVideoClip
 import pysrt
 import logging
 import os
 
+from .text_renderer import text_renderer
+from .caption_track import CaptionTrack
+
 class VideoCaptioner:
     def __init__(self):
         self.default_font = self.get_font_path("Dacherry.ttf")
@@ -30,11 +32,15 @@ class VideoCaptioner:
         #shadow_clip = shadow_clip.set_position((shadow_offset, shadow_offset))
 
         # Create the main text
-        text_clip = TextClip(txt, fontsize=fontsize*1.1, font=font, color=color, size=(width*0.8, None), method='caption', stroke_color=shadow_color, stroke_width=fontsize/15)
+        text_clip = text_renderer.text_clip(txt, **self.caption_style(fontsize, font, color, shadow_color, width))
         
         # Composite all layers
         #return CompositeVideoClip([blur_clip, shadow_clip, text_clip])
-        return CompositeVideoClip([text_clip])
+        return text_clip
+
+    def caption_style(self, fontsize, font, color, shadow_color, width) -> dict:
+        """ text_renderer arguments for one caption """
+        return dict(fontsize=fontsize*1.1, font=font, color=color, size=(width*0.8, None), stroke_color=shadow_color, stroke_width=fontsize/15)
 
     """ Call this function to generate the captions to video """
     def generate_captions_to_video(self, 
@@ -48,8 +54,7 @@ class VideoCaptioner:
         font = self.get_font_path(font) if font else self.default_font
         try:
             subtitles = subtitles_path
-            subtitle_clips = []
-            shadow_offset = font_size / 10
+            cues = []
 
             logging.info(f"Received subtitles: {type(subtitles)}")  # Debug log
 
@@ -73,29 +78,19 @@ class VideoCaptioner:
                     logging.warning(f"Skipping invalid subtitle format: {subtitle}")
                     continue
 
-                shadow_text = self.create_shadow_text(
-                    text, 
-                    fontsize=font_size, 
-                    font=font, 
-                    color=captions_color, 
-                    shadow_color=shadow_color, 
-                    shadow_offset=shadow_offset,
-                    blur_color='black',
-                    width=width
-                )
-                
                 start_seconds = start_time.ordinal / 1000 if hasattr(start_time, 'ordinal') else start_time
                 end_seconds = end_time.ordinal / 1000 if hasattr(end_time, 'ordinal') else end_time
-                duration = end_seconds - start_seconds
-                
-                subtitle_clip = (shadow_text
-                                 .set_start(start_seconds)
-                                 .set_duration(duration)
-                                 .set_position(('center', 0.4), relative=True))
-                subtitle_clips.append(subtitle_clip)
+                cues.append((start_seconds, end_seconds, text))
+
+            if not cues:
+                return []
+
+            # One clip for the whole transcript, looked up per frame
+            caption_track = CaptionTrack(cues, self.caption_style(font_size, font, captions_color, shadow_color, width))
+            caption_track = caption_track.set_position(('center', 0.4), relative=True)
 
-            logging.info(f"Generated {len(subtitle_clips)} subtitle clips")  # Debug log
-            return subtitle_clips
+            logging.info(f"Generated caption track with {len(cues)} cues")  # Debug log
+            return [caption_track]
         except Exception as e:
             logging.error(f"Error adding captions to video: {e}")
             logging.exception("Traceback:")  # This will log the full traceback
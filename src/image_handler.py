@@ -3,12 +3,13 @@ import pysrt
 import logging
 import os
 import re
-from openai import OpenAI 
 import math
 import time
 
 from dotenv import load_dotenv  # To load environment variables
 
+from .llm.gateway import gateway
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,7 +18,6 @@ class ImageHandler:
         self.pexels_api_key = pexels_api_key
         self.openai_api_key = openai_api_key
         self.pixabay_api_key = os.getenv('PIXABAY_API_KEY') or ''
-        self.openai = OpenAI(api_key=self.openai_api_key)
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
 
     def generate_image_pollinations(self, query, width=1024, height=1024, model=None, seed=None, nologo=False, private=True, enhance=False, timeout=15):
@@ -202,7 +202,7 @@ class ImageHandler:
         """Refine the keyword using OpenAI's ChatGPT 3.5 for better image search results."""
 
         try:
-            completion = self.openai.chat.completions.create(  # Async call to create chat completion
+            completion = gateway.chat_sync(
                 model="gpt-3.5-turbo",  # Updated model name
                 temperature=0.25,
                 messages = [
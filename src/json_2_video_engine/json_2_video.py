@@ -2,41 +2,67 @@ import json
 import os
 import logging
 import uuid
-import math
 
-from moviepy.editor import VideoFileClip, ImageClip, AudioFileClip, TextClip, CompositeVideoClip, CompositeAudioClip, ColorClip, concatenate_audioclips
+import numpy as np
+
+from moviepy.editor import ColorClip
+from moviepy.video.io.ffmpeg_reader import ffmpeg_parse_infos
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 from .utils.llm_calls import generate_voice
-from .utils.images_generation import search_pexels_images, search_pixabay_images, download_image, generate_image_pollinations
+from .utils.asset_prefetch import AssetPrefetcher, PrefetchedAssets
+from .timeline import TimelineCompiler
+from .planner import VideoPlanner
+from .timeline_ir import TimelineIRCompiler
+from .layer_clips import clip_from_layer
+from .parallel_render import render_parallel
 
 from ..captions.caption_handler import CaptionHandler
+from ..render.compositor import IndexedCompositeVideoClip, mark_static
+from ..render.audio_mix import AudioMix, AUDIO_FPS, decode_audio, encode_audio
+from ..render.pipeline import write_video
 
 class PyJson2Video:
 
-    def __init__(self, json_input, output_video_path: str):
+    def __init__(self, json_input, output_video_path: str, provider_limits: dict = None, render_workers: int = 1,
+                 assets: PrefetchedAssets = None):
         self.json_input = json_input
         self.output_video_path = output_video_path
+        self.provider_limits = provider_limits  # Max in-flight requests per provider, see DEFAULT_PROVIDER_LIMITS
+        self.render_workers = render_workers  # > 1 renders time segments in parallel worker processes
         self.data = None
+        self.assets = assets  # assets produced ahead of time (e.g. while the JSON was streamed), the rest is prefetched
+        self.timeline = None
+        self.ir = None
+        self.voices = {}  # script index -> in-memory Speech of its voice line
         self.video_clips = []
-        self.audio_clips = []
+        self.audio_mix = None  # whole soundtrack, mixed offline
+        self.audio_sources = []  # decoded sources in mixing order (voices, then audio entries)
         self.caption_handler = CaptionHandler()
         self.temp_files = []  # Add this to track all temporary files
 
     async def convert(self):
         try:
             self._load_json()
-            await self.parse_script()
-            self.parse_videos()
-            await self.parse_images()
+
+            # Reject malformed documents before paying for any voice or image
+            report = self.plan()
+            if not report['valid']:
+                raise ValueError(f"Invalid video JSON: {'; '.join(report['errors'])}")
+
+            await self.prefetch_assets()
+            await self.compile_timeline()
+            self.compile_ir()
+
+            self.parse_script()
             self.parse_audio()
-            self.parse_text()
-            
-            extra_args = self.parse_extra_args()
-            
-            return await self._create_final_clip(extra_args)
+            if self.render_workers <= 1:
+                # The parallel path builds the visual clips inside its worker processes
+                self.parse_visual_layers()
+
+            return await self._create_final_clip()
         except Exception as e:
             logger.error(f"An error occurred during conversion: {str(e)}")
             raise
@@ -66,314 +92,120 @@ class PyJson2Video:
             logger.error(f"JSON file not found: {self.json_input}")
             raise
 
-    def parse_videos(self):
-        resolution = self.data.get('extra_args', {}).get('resolution', {'width': 1920, 'height': 1080})
-        max_width, max_height = resolution['width'], resolution['height']
-
-        for video in self.data.get('videos', []):
+    def plan(self) -> dict:
+        """Validate the JSON and report assets, expected external calls and canvas, without any network call."""
+        if self.data is None:
+            self._load_json()
+        report = VideoPlanner(self.data).plan()
+        for warning in report['warnings']:
+            logger.warning(warning)
+        return report
+
+    async def prefetch_assets(self):
+        """Start every missing TTS and image request up front; parse_script/parse_images pick the results up."""
+        self.assets = await AssetPrefetcher(self.provider_limits).prefetch(self.data, self.assets)
+
+        # Track everything the prefetch created (voices stay in memory)
+        for index, image in enumerate(self.data.get('images', [])):
+            if image.get('source_type', 'prompt') != 'path' and self.assets.images.get(index):
+                self.temp_files.append(self.assets.images[index])
+
+    async def compile_timeline(self):
+        """Load every voice line and resolve all symbolic times before any clip is built."""
+        voice_durations = {}
+        for index, script in enumerate(self.data.get('script', [])):
             try:
-                # Check if the video file is an MP4
-                if not video['video_path'].lower().endswith('.mp4'):
-                    raise ValueError(f"Invalid video format. Only MP4 files are supported: {video['video_path']}")
-                
-                clip = VideoFileClip(video['video_path'])
-                clip = clip.subclip(float(video['start_time']), float(video['end_time']))
-                clip = clip.resize(height=int(resolution['height']))
-                
-                # Handle position
-                position = video.get('position', [50, 50])  # Default to center if not specified
-                if isinstance(position, list) and len(position) == 2:
-                    # Convert position to relative coordinates
-                    rel_x = position[0] / 100 * max_width
-                    rel_y = position[1] / 100 * max_height
-                    
-                    # Adjust position to center the video
-                    center_x = rel_x - clip.w / 2
-                    center_y = rel_y - clip.h / 2
-                    
-                    clip = clip.set_position((center_x, center_y))
+                if self.assets and ('script', index) in self.assets.errors:
+                    raise self.assets.errors[('script', index)]
+                if self.assets and index in self.assets.voices:
+                    speech = self.assets.voices[index]
                 else:
-                    logger.warning(f"Invalid position for video {video.get('video_path')}: {position}")
-                    clip = clip.set_position('center')
-                
-                clip = clip.set_opacity(float(video['opacity']))
-                clip = clip.volumex(float(video['volume']))
-
-
-                start_time = self._get_time(video, 'start_time')
-                end_time = self._get_time(video, 'end_time')
-
-                clip = clip.set_start(start_time).set_duration(end_time - start_time)
-
-                self.video_clips.append(clip)
-                logger.info(f"Video {video.get('video_path')} added to video clips, start time: {start_time}, end time: {end_time}")
+                    speech = await generate_voice(script['text'])
+                if speech is None:
+                    raise RuntimeError(f"Voice generation failed for: {script.get('text')}")
+                # Decoded in memory; the duration is the exact decoded length
+                self.voices[index] = speech
+                voice_durations[index] = speech.duration
             except Exception as e:
-                logger.error(f"Error processing video {video.get('video_path')}: {str(e)}")
+                logger.error(f"Error processing script: {script.get('text')}: {str(e)}")
                 raise
 
-    async def parse_images(self):
-        resolution = self.data.get('extra_args', {}).get('resolution', {'width': 1920, 'height': 1080})
-        max_width, max_height = resolution['width'], resolution['height']
+        self.timeline = TimelineCompiler(self.data).compile(voice_durations)
 
-        for image in self.data.get('images', []):
-            source_type = image.get('source_type', 'prompt')
-            
-            try:
-                # Get image source
-                image_source = None
-                image_urls = []
-                
-                if source_type == 'path':
-                    image_source = image['source_content']
-                elif source_type == 'prompt':
-                    query = image['source_content']
-                    # Try different image sources in sequence
-                    image_urls = generate_image_pollinations(query)
-                    if not image_urls:
-                        logger.info("Trying Pexels as fallback...")
-                        image_urls = search_pexels_images(query)
-                    if not image_urls:
-                        logger.info("Trying Pixabay as final fallback...")
-                        image_urls = search_pixabay_images(query)
-                    
-                    if image_urls:
-                        image_source = download_image(image_urls[0])
-                        if image_source:
-                            self.temp_files.append(image_source)  # Track downloaded image
-                    else:
-                        logger.error(f"No images found for prompt: {query}")
-                        continue
-                elif source_type == 'url':
-                    image_source = download_image(image['source_content'])
-                    if image_source:
-                        self.temp_files.append(image_source)  # Track downloaded image
-
-                # Create and process the image clip
-                clip = ImageClip(image_source)
-                
-                # Handle 'full' argument and determine target dimensions
-                if image.get('max_width') == 'full':
-                    target_width = max_width
-                else:
-                    target_width = min(int(image.get('max_width', max_width)), max_width)
+    def compile_ir(self):
+        """Compile the JSON, timeline and fetched assets into the immutable layer list the backends consume."""
+        voice_paths = {index: speech.source for index, speech in self.voices.items()}
+        image_paths = self.assets.images if self.assets else {}
+        self.ir = TimelineIRCompiler(self.data, self.timeline, voice_paths, image_paths).compile()
 
-                if image.get('max_height') == 'full':
-                    target_height = max_height
-                else:
-                    target_height = min(int(image.get('max_height', max_height)), max_height)
-
-                # Calculate the scaling factor to maintain aspect ratio with 10% zoom
-                width_ratio = (target_width / clip.w) * 1.1  # 10% zoom
-                height_ratio = (target_height / clip.h) * 1.1  # 10% zoom
-                scale_factor = min(width_ratio, height_ratio)
-
-                # Resize the clip with zoom
-                new_width = math.ceil(clip.w * scale_factor)
-                new_height = math.ceil(clip.h * scale_factor)
-                clip = clip.resize(width=new_width, height=new_height)
-                
-                # Handle position
-                position = image.get('position', [50, 50]) # Default to center if not specified
-                if isinstance(position, list) and len(position) == 2:
-                    # Convert position to relative coordinates
-                    rel_x = position[0] / 100 * max_width
-                    rel_y = position[1] / 100 * max_height
-                    
-                    # Adjust position to center the image
-                    center_x = rel_x - new_width / 2
-                    center_y = rel_y - new_height / 2
-                    
-                    clip = clip.set_position((center_x, center_y))
-                else:
-                    logger.warning(f"Invalid position for image {image.get('image_path')}: {position}")
-                    clip = clip.set_position('center')
-
-                clip = clip.set_opacity(float(image.get('opacity', 1.0)))
-                if 'rotation' in image:
-                    clip = clip.rotate(float(image.get('rotation', 0)))
-                
-                start_time = self._get_time(image, 'start_time')
-                end_time = self._get_time(image, 'end_time')
-                
-                clip = clip.set_start(start_time).set_duration(end_time - start_time)
+    def parse_script(self):
+        self.audio_mix = AudioMix(self.ir.duration)
+        for layer, speech in zip(self.ir.layers_of('voice'), self.voices.values()):
+            # Mixed in at the voice start, cut to the voice duration
+            self.audio_mix.add(speech.samples, layer.start, duration=layer.duration)
+            self.audio_sources.append(speech.samples[:int(round(layer.duration * AUDIO_FPS))])
+            logger.info(f"Audio {layer.source} added to audio clips, start time: {layer.start}, end time: {layer.end}")
 
-                self.video_clips.append(clip)
-                logger.info(f"Image {image.get('source_content')} added to video clips, start time: {start_time}, end time: {end_time}")
-            except Exception as e:
-                logger.error(f"Error processing image {image.get('image_id', 'unknown')}: {str(e)}")
-                continue
+        # After processing all scripts, update the total duration of the video
+        self.total_duration = self.ir.duration
 
     def parse_audio(self):
-        for audio in self.data.get('audio', []):
+        for layer in self.ir.layers_of('audio'):
             try:
                 # If the audio is a temporary file (e.g., downloaded or generated)
-                if audio.get('is_temp', False):
-                    self.temp_files.append(audio['audio_path'])
-                
-                clip = AudioFileClip(audio['audio_path'])
-                #clip = clip.subclip(float(audio['start_time']), float(audio['end_time']))
-                clip = clip.volumex(float(audio['volume']))
-
-                start_time = self._get_time(audio, 'start_time')
-                end_time = self._get_time(audio, 'end_time')
-                
-                clip = clip.set_start(start_time).set_duration(end_time - start_time)
-                
-                self.audio_clips.append(clip)
-                logger.info(f"Audio {audio.get('audio_path')} added to audio clips, start time: {start_time}, end time: {end_time}")
-            except Exception as e:
-                logger.error(f"Error processing audio {audio.get('audio_path')}: {str(e)}")
-                raise
-
-    async def parse_script(self):
-        resolution = self.data.get('extra_args', {}).get('resolution', {'width': 1920, 'height': 1080})
-        max_width, max_height = resolution['width'], resolution['height']
-
-        last_end_time = 0  # Keep track of the last end time
-
-        for index, script in enumerate(self.data.get('script', [])):
-            try:
-                audio_path = await generate_voice(script['text'])
-                self.temp_files.append(audio_path)  # Track generated voice audio
-                script_clip = AudioFileClip(audio_path)
-                
-                # Determine start time based on the previous end_time script item
-                if index > 0:
-                    start_time = self._get_time(self.data['script'][index-1], 'end_time')
-                else:
-                    start_time = 0
-
-                # Calculate timings
-                voice_start_time = start_time + script.get('voice_start_time', 0)
-                post_pause_duration = script.get('post_pause_duration', 0)
-
-                clip_duration = script_clip.duration
-                end_time = voice_start_time + clip_duration + post_pause_duration
-                voice_end_time = voice_start_time + clip_duration
-                
-                # Update the script item with calculated start and end times
-                self.data['script'][index]['start_time'] = start_time
-                self.data['script'][index]['voice_start_time'] = voice_start_time
-                self.data['script'][index]['voice_end_time'] = voice_end_time
-                self.data['script'][index]['end_time'] = end_time
-
-                # Set the clip's start time and duration
-                script_clip = script_clip.set_start(voice_start_time).set_duration(clip_duration)
-
-                self.audio_clips.append(script_clip)
-                logger.info(f"Audio {audio_path} added to audio clips, start time: {start_time}, end time: {end_time}")
-                # Update the last end time
-                last_end_time = end_time
+                if layer.param('is_temp'):
+                    self.temp_files.append(layer.source)
 
+                samples = decode_audio(layer.source, end=layer.duration)
+                self.audio_mix.add(samples, layer.start, volume=layer.param('volume'), duration=layer.duration)
+                self.audio_sources.append(samples)
+                logger.info(f"Audio {layer.source} added to audio clips, start time: {layer.start}, end time: {layer.end}")
             except Exception as e:
-                logger.error(f"Error processing script: {script.get('text')}: {str(e)}")
+                logger.error(f"Error processing audio {layer.source}: {str(e)}")
                 raise
 
-        # After processing all scripts, update the total duration of the video
-        self.total_duration = max(clip.end for clip in self.audio_clips + self.video_clips)
-
-    def parse_text(self):
-        resolution = self.data.get('extra_args', {}).get('resolution', {'width': 1920, 'height': 1080})
-        max_width, max_height = resolution['width'], resolution['height']
-
-        for text in self.data.get('text', []):
-            try:
-                
-                content = text.get('content')
-                font = text.get('font', 'Arial')
-                size = (int(max_width * 0.8), None)
-                color = text.get('color', 'white')
-                fontsize = min(int(text.get('font_size', int(max_height * 0.06))), int(max_height * 0.06))
-                shadow_color = text.get('shadow_color', 'black')
-                shadow_offset = fontsize / 15
-
-                clip = TextClip(
-                    content,
-                    size=size,
-                    fontsize=fontsize,
-                    font=font,
-                    color=color,
-                    method='caption',
-                    align='center'
-                )
-                shadow_clip = TextClip(content, fontsize=fontsize, font=font, color=shadow_color, size=size, method='caption')
-                shadow_clip = shadow_clip.set_position((shadow_offset, shadow_offset))
-                
-                # Composite all layers
-                composite_clip = CompositeVideoClip([shadow_clip, clip])
-                
-                # Handle position
-                position = text.get('position', [50, 50])  # Default to center if not specified
-                if isinstance(position, list) and len(position) == 2:
-                    # Convert position to relative coordinates
-                    rel_x = position[0] / 100 * max_width
-                    rel_y = position[1] / 100 * max_height
-                        
-                    # Adjust position to center the text
-                    center_x = rel_x - clip.w / 2
-                    center_y = rel_y - composite_clip.h / 2
-                        
-                    composite_clip = composite_clip.set_position((center_x, center_y))
-                else:
-                    logger.warning(f"Invalid position for script text: {text.get('text')}: {position}")
-                    composite_clip = composite_clip.set_position('center')
-  
-                start_time = self._get_time(text, 'start_time')
-                end_time = self._get_time(text, 'end_time')
-                
-                composite_clip = composite_clip.set_start(start_time).set_duration(end_time - start_time)
-                
-                self.video_clips.append(composite_clip)
-                logger.info(f"Text {text.get('content')} added to video clips, start time: {start_time}, end time: {end_time}")
-            except Exception as e:
-                logger.error(f"Error processing script text: {text.get('text')}: {str(e)}")
-                raise
-
-    def parse_extra_args(self):
-        try:
-            extra_args = self.data.get('extra_args', {})
-            return extra_args
-        except Exception as e:
-            logger.error(f"Error parsing extra arguments: {str(e)}")
-            raise
+        # Without voices or audio entries, the soundtrack is the video layers' own audio
+        if not self.audio_sources:
+            for layer in self.ir.layers_of('video'):
+                if ffmpeg_parse_infos(layer.source)['audio_found']:
+                    samples = decode_audio(layer.source, layer.param('source_start'), layer.param('source_end'))
+                    self.audio_mix.add(samples, layer.start, volume=layer.param('volume'), duration=layer.duration)
+
+    def parse_visual_layers(self):
+        """Build the video/image/text clips in z order."""
+        for layer in self.ir.visual_layers():
+            clip = clip_from_layer(layer)
+            if clip is not None:
+                self.video_clips.append(clip)
+                logger.info(f"{layer.kind.capitalize()} {layer.source} added to video clips, start time: {layer.start}, end time: {layer.end}")
 
-    async def _create_final_clip(self, extra_args:dict) -> str:
+    async def _create_final_clip(self) -> str:
         temp_files = []  # Track temporary files for cleanup
+        subtitles_path = None
         try:
-            resolution = extra_args.get('resolution', {'width': 1920, 'height': 1080})
-            background_color = extra_args.get('background_color', [249, 249, 249])
-            captions_settings = extra_args.get('captions', {})
-            
-            # If background_color is a string, convert it to RGB
-            if isinstance(background_color, str):
-                if background_color.lower() == 'white':
-                    background_color = [255, 255, 255]
-                elif background_color.lower() == 'black':
-                    background_color = [0, 0, 0]
-            
+            resolution = {'width': self.ir.width, 'height': self.ir.height}
+            background_color = list(self.ir.background_color)
+            captions_settings = self.ir.caption_settings()
+
             # Create a blank background clip if no video clips exist
-            if not self.video_clips:
+            if not self.video_clips and not (self.render_workers > 1 and self.ir.visual_layers()):
                 logger.warning("No video clips found, creating blank background clip")
-                # Calculate duration from audio clips or use default
-                duration = max([clip.end for clip in self.audio_clips]) if self.audio_clips else 10
+                # Use the audio duration or a default
+                duration = self.ir.duration or 10
                 blank_clip = ColorClip(
                     size=(resolution['width'], resolution['height']),
                     color=background_color,
                     duration=duration
                 )
-                self.video_clips.append(blank_clip)
+                self.video_clips.append(mark_static(blank_clip))
             
             # Process captions for all script audio clips
             if captions_settings.get('enabled', False):
-                script_audio_clips = [clip for clip in self.audio_clips if hasattr(clip, 'filename')]
-                if script_audio_clips:
-                    # Concatenate all audio clips
-                    final_audio = concatenate_audioclips(script_audio_clips)
-                    
+                if self.audio_sources:
                     # Save the concatenated audio temporarily
                     temp_audio_path = os.path.join(os.path.dirname(__file__), 'assets', f"temp_combined_audio_{uuid.uuid4()}.wav")
                     temp_files.append(temp_audio_path)  # Track for cleanup
-                    final_audio.write_audiofile(temp_audio_path)
+                    encode_audio(np.concatenate(self.audio_sources), temp_audio_path)
                     
                     # Generate captions
                     subtitles_path, subtitle_clips = await self.caption_handler.process(
@@ -388,20 +220,47 @@ class PyJson2Video:
                         temp_files.append(subtitles_path)  # Track for cleanup
                     
                     self.video_clips.extend(subtitle_clips)
-            
-            final_clip = CompositeVideoClip(
+
+            # The soundtrack is already mixed; it is encoded straight from the buffer
+            final_audio = self.audio_mix.to_clip() if self.audio_mix.sources else None
+
+            if self.render_workers > 1:
+                # Same length as the serial composite: the last visual layer, caption or blank background
+                render_end = max([layer.end for layer in self.ir.visual_layers()] + [clip.end for clip in self.video_clips])
+                render_parallel(
+                    self.ir,
+                    render_end,
+                    final_audio,
+                    self.output_video_path,
+                    self.render_workers,
+                    subtitles_path=subtitles_path,
+                    caption_args={
+                        'captions_color': captions_settings.get('color', 'white'),
+                        'shadow_color': captions_settings.get('background_color', 'black'),
+                        'font_size': captions_settings.get('font_size', resolution['height'] * 0.05),
+                        'font': captions_settings.get('font', 'LEMONMILK-Bold.otf'),
+                        'width': resolution['width'],
+                    }
+                )
+                for clip in self.video_clips:
+                    clip.close()
+                return self.output_video_path
+
+            # Layers are already in z order (see TimelineIR), captions go on top
+            final_clip = IndexedCompositeVideoClip(
                 self.video_clips,
                 size=(resolution['width'], resolution['height']),
                 bg_color=background_color
             )
             
             # Add audio to the final clip
-            if self.audio_clips:
-                final_audio = CompositeAudioClip(self.audio_clips)
+            if final_audio is not None:
                 final_clip = final_clip.set_audio(final_audio)
             
             # Write the final video file
-            final_clip.write_videofile(
+            # Composition, video encoding and audio encoding run concurrently
+            write_video(
+                final_clip,
                 self.output_video_path,
                 fps=30,
                 codec='libx264',
@@ -417,8 +276,6 @@ class PyJson2Video:
             # Close all source clips
             for clip in self.video_clips:
                 clip.close()
-            for clip in self.audio_clips:
-                clip.close()
 
             return self.output_video_path
         except Exception as e:
@@ -433,31 +290,3 @@ class PyJson2Video:
                         logger.debug(f"Removed temporary file: {temp_file}")
                 except OSError as e:
                     logger.warning(f"Failed to remove temporary file {temp_file}: {e}")
-    
-    def _get_time(self, asset, time_key: str) -> float:
-        time_value = asset.get(time_key)
-
-        if isinstance(time_value, (int, float)):
-            return float(time_value)
-
-        if isinstance(time_value, str):
-            time_parts = time_value.split('.')
-            if len(time_parts) != 2:
-                raise ValueError(f"Invalid {time_key}: {time_value}")
-
-            time_id, time_type = time_parts
-            item = next((item for item in self.data.get('script', []) if item['_id'] == time_id), None)
-            if item:
-                if time_type == 'voice_start_time':
-                    return item.get('voice_start_time')
-                elif time_type == 'voice_end_time':
-                    return item.get('voice_end_time')
-                elif time_type == 'end_time':
-                    return item.get('end_time', 'voice_end_time')
-                elif time_type == 'start_time':
-                    return item.get('start_time', 'voice_start_time')
-
-        raise ValueError(f"Unable to determine {time_key} for: {time_value}")
-
-
-
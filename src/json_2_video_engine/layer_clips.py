@@ -0,0 +1,88 @@
+import logging
+
+from ..captions.text_renderer import text_renderer
+from ..render.compositor import mark_static
+from ..render.image_ingest import sprite_clip
+from ..render.video_source import DecodedVideoClip
+from ..render.transforms import set_opacity
+from .timeline_ir import DEFAULT_FPS
+
+logger = logging.getLogger(__name__)
+
+
+def video_clip_from_layer(layer):
+    try:
+        # ffmpeg scales to the layer size and the output frame rate while decoding;
+        # the audio (with the layer volume) goes through the offline mix instead
+        clip = DecodedVideoClip(layer.source, size=(layer.rect[2], layer.rect[3]), fps=DEFAULT_FPS, audio=False)
+        clip = clip.subclip(layer.param('source_start'), layer.param('source_end'))
+
+        # Position is the center of the video
+        center_x, center_y, _, _ = layer.rect
+        clip = clip.set_position((center_x - clip.w / 2, center_y - clip.h / 2))
+
+        # Full opacity is skipped rather than wrapped around every frame
+        return set_opacity(clip, layer.opacity)
+    except Exception as e:
+        logger.error(f"Error processing video {layer.source}: {str(e)}")
+        raise
+
+
+def image_clip_from_layer(layer):
+    try:
+        center_x, center_y, width, height = layer.rect
+        # Decoded at the zoomed size with rotation and opacity applied once
+        clip = sprite_clip(layer.source, width, height, rotation=layer.param('rotation', 0), opacity=layer.opacity)
+        return clip.set_position((center_x - width / 2, center_y - height / 2))
+    except Exception as e:
+        logger.error(f"Error processing image {layer.source}: {str(e)}")
+        return None
+
+
+def text_clip_from_layer(layer):
+    try:
+        center_x, center_y, width, _ = layer.rect
+        font = layer.param('font')
+        fontsize = layer.param('font_size')
+        shadow_offset = fontsize / 15
+
+        # Fill and drop shadow are rasterized together
+        clip = text_renderer.text_clip(
+            layer.source,
+            size=(width, None),
+            fontsize=fontsize,
+            font=font,
+            color=layer.param('color'),
+            shadow_color=layer.param('shadow_color'),
+            shadow_offset=shadow_offset,
+            align='center'
+        )
+
+        # Adjust position to center the text
+        return clip.set_position((center_x - width / 2, center_y - clip.h / 2))
+    except Exception as e:
+        logger.error(f"Error processing script text: {layer.source}: {str(e)}")
+        raise
+
+
+# Layers whose frame never changes (their composed frames can be reused)
+STATIC_KINDS = ('image', 'text')
+
+CLIP_BUILDERS = {
+    'video': video_clip_from_layer,
+    'image': image_clip_from_layer,
+    'text': text_clip_from_layer,
+}
+
+
+def clip_from_layer(layer, offset: float = 0.0):
+    """Build the positioned, timed moviepy clip of a visual layer (None if it had to be skipped).
+
+    offset shifts the layer on the timeline, used when rendering a segment that starts at `offset`.
+    """
+    clip = CLIP_BUILDERS[layer.kind](layer)
+    if clip is None:
+        return None
+    if layer.kind in STATIC_KINDS:
+        clip = mark_static(clip)
+    return clip.set_start(layer.start - offset).set_duration(layer.duration)
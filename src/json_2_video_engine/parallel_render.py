@@ -0,0 +1,177 @@
+import os
+import shutil
+import logging
+import tempfile
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pysrt
+from moviepy.config import get_setting
+from moviepy.editor import ColorClip
+
+from .layer_clips import clip_from_layer
+from ..captions.video_captioner import VideoCaptioner
+from ..captions.utils import convert_seconds_to_srt_time
+from ..render.compositor import IndexedCompositeVideoClip, mark_static
+from ..render.pipeline import write_video
+
+logger = logging.getLogger(__name__)
+
+# Segments shorter than this are not worth a worker process
+MIN_SEGMENT_SECONDS = 2.0
+
+
+def frame_count(duration: float, fps: int) -> int:
+    """Number of frames write_video (and write_videofile) produces for a clip of this duration."""
+    return len(np.arange(0, duration, 1.0 / fps))
+
+
+def plan_segments(ir, duration: float, segments: int) -> list:
+    """Split [0, duration) into at most `segments` frame ranges, cutting at layer boundaries when possible.
+
+    Returns a list of (first_frame, end_frame) tuples covering every output frame exactly once.
+    """
+    fps = ir.fps
+    total_frames = frame_count(duration, fps)
+    min_frames = int(MIN_SEGMENT_SECONDS * fps)
+    segments = max(1, min(segments, total_frames // max(min_frames, 1)))
+    if segments == 1:
+        return [(0, total_frames)]
+
+    # Scene changes (script items, images, text) are the natural cut points
+    candidates = sorted({round(layer.start * fps) for layer in ir.layers if layer.kind != 'audio'} - {0})
+    candidates = [frame for frame in candidates if frame < total_frames]
+
+    cuts = []
+    step = total_frames / segments
+    for index in range(1, segments):
+        target = round(index * step)
+        nearest = min(candidates, key=lambda frame: abs(frame - target), default=None)
+        cut = nearest if nearest is not None and abs(nearest - target) <= step / 2 else target
+        if cut - (cuts[-1] if cuts else 0) >= min_frames and total_frames - cut >= min_frames:
+            cuts.append(cut)
+
+    bounds = [0] + cuts + [total_frames]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _render_segment(job: dict) -> str:
+    """Worker entry point: rebuild the clips of one segment from the IR and encode it without audio."""
+    ir = job['ir']
+    fps = ir.fps
+    start_time = job['first_frame'] / fps
+    frames = job['end_frame'] - job['first_frame']
+    # Half a frame short so that iter_frames yields exactly `frames` frames
+    duration = (frames - 0.5) / fps
+    end_time = start_time + frames / fps
+
+    clips = []
+    for layer in ir.visual_layers():
+        if layer.end <= start_time or layer.start >= end_time:
+            continue
+        clip = clip_from_layer(layer, offset=start_time)
+        if clip is not None:
+            clips.append(clip)
+
+    if job['cues']:
+        cues = [(convert_seconds_to_srt_time(start), convert_seconds_to_srt_time(end), text) for start, end, text in job['cues']]
+        caption_clips = VideoCaptioner().generate_captions_to_video(cues, **job['caption_args'])
+        clips.extend(clip.set_start(clip.start - start_time) for clip in caption_clips)
+
+    if not clips:
+        clips.append(mark_static(ColorClip(size=ir.size, color=ir.background_color, duration=duration)))
+
+    segment_clip = IndexedCompositeVideoClip(clips, size=ir.size, bg_color=ir.background_color).set_duration(duration)
+    write_video(
+        segment_clip,
+        job['output_path'],
+        fps=fps,
+        codec=job['codec'],
+        preset=job['preset'],
+        audio=False
+    )
+
+    segment_clip.close()
+    for clip in clips:
+        clip.close()
+    return job['output_path']
+
+
+def _segment_cues(subtitles_path: str, start_time: float, end_time: float) -> list:
+    if not subtitles_path:
+        return []
+    cues = []
+    for subtitle in pysrt.open(subtitles_path):
+        start, end = subtitle.start.ordinal / 1000, subtitle.end.ordinal / 1000
+        if end > start_time and start < end_time:
+            cues.append((start, end, subtitle.text))
+    return cues
+
+
+def render_parallel(ir, duration: float, audio_clip, output_path: str, workers: int,
+                    subtitles_path: str = None, caption_args: dict = None,
+                    codec: str = 'libx264', preset: str = 'veryfast') -> str:
+    """Render the timeline in frame-aligned segments across a process pool and join them without re-encoding.
+
+    Segment boundaries fall on exact frame times and the audio is encoded once for the whole
+    video, so duration and A/V sync match the single write_videofile path.
+
+    Args:
+        ir (TimelineIR): Compiled timeline, shipped to every worker.
+        duration (float): Video duration (same as the serial composite clip).
+        audio_clip: Final mixed audio clip, or None.
+        workers (int): Number of worker processes.
+        subtitles_path (str): SRT file whose captions are rebuilt inside each worker.
+        caption_args (dict): Keyword arguments for VideoCaptioner.generate_captions_to_video.
+    """
+    fps = ir.fps
+    segments = plan_segments(ir, duration, workers)
+    logger.info(f"Rendering {len(segments)} segments on {workers} workers")
+
+    ffmpeg_binary = get_setting("FFMPEG_BINARY")
+    temp_dir = tempfile.mkdtemp(prefix='segments_', dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        jobs = []
+        for index, (first_frame, end_frame) in enumerate(segments):
+            jobs.append({
+                'ir': ir,
+                'first_frame': first_frame,
+                'end_frame': end_frame,
+                'cues': _segment_cues(subtitles_path, first_frame / fps, end_frame / fps),
+                'caption_args': caption_args or {},
+                'output_path': os.path.join(temp_dir, f"segment_{index:04d}.mp4"),
+                'codec': codec,
+                'preset': preset,
+            })
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_render_segment, job) for job in jobs]
+
+            # Encode the soundtrack once while the workers render
+            audio_path = None
+            if audio_clip is not None:
+                audio_path = os.path.join(temp_dir, 'audio.m4a')
+                audio_clip.write_audiofile(audio_path, fps=44100, nbytes=4, buffersize=2000, codec='aac', logger=None)
+
+            segment_paths = [future.result() for future in futures]
+
+        concat_list_path = os.path.join(temp_dir, 'segments.txt')
+        with open(concat_list_path, 'w') as f:
+            for segment_path in segment_paths:
+                escaped_path = segment_path.replace("'", "'\\''")
+                f.write(f"file '{escaped_path}'\n")
+
+        cmd = [ffmpeg_binary, '-y', '-loglevel', 'error', '-f', 'concat', '-safe', '0', '-i', concat_list_path]
+        if audio_path:
+            cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a']
+        cmd += ['-c', 'copy', output_path]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+        logger.info(f"Joined {len(segment_paths)} segments into {output_path}")
+        return output_path
+    except subprocess.CalledProcessError as e:
+        logger.error(f"Error joining segments: {e.stderr.decode(errors='ignore')}")
+        raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
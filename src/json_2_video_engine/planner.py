@@ -0,0 +1,259 @@
+import os
+import sys
+import json
+import argparse
+
+from .timeline import TimelineCompiler, TimelineError, ASSET_COLLECTIONS
+
+DEFAULT_RESOLUTION = {'width': 1920, 'height': 1080}
+DEFAULT_FPS = 30
+TOP_LEVEL_KEYS = ('script',) + ASSET_COLLECTIONS + ('extra_args',)
+SOURCE_TYPES = ('prompt', 'path', 'url')
+BACKGROUND_COLORS = ('white', 'black')
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class VideoPlanner:
+    """Checks a video JSON and reports what rendering it will cost, without any network call.
+
+    Everything that does not depend on synthesized audio is validated up front (schema,
+    positions, file paths, time references, cycles), so bad jobs fail in milliseconds
+    instead of after voice generation and image downloads.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.errors = []
+        self.warnings = []
+
+    def plan(self) -> dict:
+        if not isinstance(self.data, dict):
+            self.errors.append("JSON root must be an object")
+            return self._report()
+
+        for key in self.data:
+            if key not in TOP_LEVEL_KEYS:
+                self.warnings.append(f"Unknown top-level key ignored: {key}")
+        for key in TOP_LEVEL_KEYS[:-1]:
+            if not isinstance(self.data.get(key, []), list):
+                self.errors.append(f"'{key}' must be a list")
+        if self.errors:
+            return self._report()
+
+        self._check_extra_args()
+        self._check_script()
+        self._check_images()
+        self._check_videos()
+        self._check_text()
+        self._check_audio()
+        self._check_timeline()
+        return self._report()
+
+    def _check_position(self, label: str, item: dict):
+        position = item.get('position', [50, 50])
+        if not (isinstance(position, list) and len(position) == 2 and all(_is_number(v) for v in position)):
+            self.errors.append(f"{label}: position must be [x, y] percentages, got {position!r}")
+        elif not all(0 <= v <= 100 for v in position):
+            self.warnings.append(f"{label}: position {position} is outside the canvas")
+
+    def _check_fraction(self, label: str, item: dict, key: str):
+        if key in item and not (_is_number(item[key]) and 0 <= item[key] <= 1):
+            self.errors.append(f"{label}: {key} must be a number between 0 and 1, got {item[key]!r}")
+
+    def _check_times_present(self, label: str, item: dict):
+        for key in ('start_time', 'end_time'):
+            if key not in item:
+                self.errors.append(f"{label}: missing {key}")
+
+    def _check_extra_args(self):
+        extra_args = self.data.get('extra_args', {})
+        if not isinstance(extra_args, dict):
+            self.errors.append("'extra_args' must be an object")
+            return
+
+        resolution = extra_args.get('resolution', DEFAULT_RESOLUTION)
+        if not (isinstance(resolution, dict) and all(isinstance(resolution.get(k), int) and resolution.get(k) > 0 for k in ('width', 'height'))):
+            self.errors.append(f"extra_args.resolution must have positive integer width and height, got {resolution!r}")
+
+        background_color = extra_args.get('background_color', [249, 249, 249])
+        if isinstance(background_color, str):
+            if background_color.lower() not in BACKGROUND_COLORS:
+                self.errors.append(f"extra_args.background_color must be one of {BACKGROUND_COLORS} or [r, g, b], got {background_color!r}")
+        elif not (isinstance(background_color, list) and len(background_color) == 3 and all(isinstance(v, int) and 0 <= v <= 255 for v in background_color)):
+            self.errors.append(f"extra_args.background_color must be [r, g, b], got {background_color!r}")
+
+        if not isinstance(extra_args.get('captions', {}), dict):
+            self.errors.append("extra_args.captions must be an object")
+
+    def _check_script(self):
+        for index, script in enumerate(self.data.get('script', [])):
+            label = f"script[{index}]"
+            if not isinstance(script, dict):
+                self.errors.append(f"{label}: must be an object")
+                continue
+            if not isinstance(script.get('text'), str) or not script['text'].strip():
+                self.errors.append(f"{label}: text must be a non-empty string")
+            for key in ('voice_start_time', 'post_pause_duration'):
+                if key in script and not (_is_number(script[key]) and script[key] >= 0):
+                    self.errors.append(f"{label}: {key} must be a non-negative number, got {script[key]!r}")
+
+    def _check_images(self):
+        for index, image in enumerate(self.data.get('images', [])):
+            label = f"images[{index}]"
+            if not isinstance(image, dict):
+                self.errors.append(f"{label}: must be an object")
+                continue
+            source_type = image.get('source_type', 'prompt')
+            if source_type not in SOURCE_TYPES:
+                self.errors.append(f"{label}: unknown source_type {source_type!r}, expected one of {SOURCE_TYPES}")
+            if not isinstance(image.get('source_content'), str) or not image['source_content'].strip():
+                self.errors.append(f"{label}: source_content must be a non-empty string")
+            elif source_type == 'path' and not os.path.exists(image['source_content']):
+                self.errors.append(f"{label}: image file not found: {image['source_content']}")
+            elif source_type == 'url' and not image['source_content'].startswith(('http://', 'https://')):
+                self.errors.append(f"{label}: invalid url: {image['source_content']}")
+            for key in ('max_width', 'max_height'):
+                if key in image and image[key] != 'full' and not (_is_number(image[key]) and image[key] > 0):
+                    self.errors.append(f"{label}: {key} must be 'full' or a positive number, got {image[key]!r}")
+            if 'rotation' in image and not _is_number(image['rotation']):
+                self.errors.append(f"{label}: rotation must be a number, got {image['rotation']!r}")
+            self._check_position(label, image)
+            self._check_fraction(label, image, 'opacity')
+            self._check_times_present(label, image)
+
+    def _check_videos(self):
+        for index, video in enumerate(self.data.get('videos', [])):
+            label = f"videos[{index}]"
+            if not isinstance(video, dict):
+                self.errors.append(f"{label}: must be an object")
+                continue
+            video_path = video.get('video_path')
+            if not isinstance(video_path, str) or not video_path.lower().endswith('.mp4'):
+                self.errors.append(f"{label}: video_path must be an MP4 file, got {video_path!r}")
+            elif not os.path.exists(video_path):
+                self.errors.append(f"{label}: video file not found: {video_path}")
+            # The source subclip is cut with float(start_time)/float(end_time)
+            for key in ('start_time', 'end_time'):
+                if key in video and not _is_number(video[key]):
+                    self.errors.append(f"{label}: {key} must be a number of seconds, got {video[key]!r}")
+            for key in ('opacity', 'volume'):
+                if key not in video:
+                    self.errors.append(f"{label}: missing {key}")
+            self._check_fraction(label, video, 'opacity')
+            if 'volume' in video and not (_is_number(video['volume']) and video['volume'] >= 0):
+                self.errors.append(f"{label}: volume must be a non-negative number, got {video['volume']!r}")
+            self._check_position(label, video)
+            self._check_times_present(label, video)
+
+    def _check_text(self):
+        for index, text in enumerate(self.data.get('text', [])):
+            label = f"text[{index}]"
+            if not isinstance(text, dict):
+                self.errors.append(f"{label}: must be an object")
+                continue
+            if not isinstance(text.get('content'), str) or not text['content'].strip():
+                self.errors.append(f"{label}: content must be a non-empty string")
+            if 'font_size' in text and not (_is_number(text['font_size']) and text['font_size'] > 0):
+                self.errors.append(f"{label}: font_size must be a positive number, got {text['font_size']!r}")
+            self._check_position(label, text)
+            self._check_times_present(label, text)
+
+    def _check_audio(self):
+        for index, audio in enumerate(self.data.get('audio', [])):
+            label = f"audio[{index}]"
+            if not isinstance(audio, dict):
+                self.errors.append(f"{label}: must be an object")
+                continue
+            audio_path = audio.get('audio_path')
+            if not isinstance(audio_path, str):
+                self.errors.append(f"{label}: audio_path must be a string, got {audio_path!r}")
+            elif not os.path.exists(audio_path):
+                self.errors.append(f"{label}: audio file not found: {audio_path}")
+            if not (_is_number(audio.get('volume')) and audio['volume'] >= 0):
+                self.errors.append(f"{label}: volume must be a non-negative number, got {audio.get('volume')!r}")
+            self._check_times_present(label, audio)
+
+    def _check_timeline(self):
+        if self.errors:
+            # Time references are only meaningful on an otherwise well-formed document
+            return
+        try:
+            # Voice durations are unknown until TTS runs, every reference is still checked
+            self.timeline = TimelineCompiler(self.data).compile({}, allow_unknown=True)
+        except TimelineError as e:
+            self.errors.append(str(e))
+            return
+
+        for (collection, index, field), start_time in self.timeline.times.items():
+            if field != 'start_time' or collection == 'script':
+                continue
+            end_time = self.timeline.get(collection, index, 'end_time')
+            if start_time is not None and end_time is not None and end_time <= start_time:
+                self.errors.append(f"{collection}[{index}]: end_time ({end_time}) must be after start_time ({start_time})")
+
+    def _report(self) -> dict:
+        data = self.data if isinstance(self.data, dict) else {}
+        extra_args = data.get('extra_args', {}) if isinstance(data.get('extra_args', {}), dict) else {}
+        resolution = extra_args.get('resolution', DEFAULT_RESOLUTION)
+        captions_enabled = isinstance(extra_args.get('captions'), dict) and extra_args['captions'].get('enabled', False)
+
+        def count(collection):
+            items = data.get(collection, [])
+            return len(items) if isinstance(items, list) else 0
+
+        images = [image for image in data.get('images', []) if isinstance(image, dict)] if count('images') else []
+        prompt_images = sum(1 for image in images if image.get('source_type', 'prompt') == 'prompt')
+        url_images = sum(1 for image in images if image.get('source_type') == 'url')
+
+        assets = {collection: count(collection) for collection in ('script',) + ASSET_COLLECTIONS}
+        assets['total'] = sum(assets.values())
+
+        return {
+            'valid': not self.errors,
+            'errors': self.errors,
+            'warnings': self.warnings,
+            'canvas': {
+                'width': resolution.get('width') if isinstance(resolution, dict) else None,
+                'height': resolution.get('height') if isinstance(resolution, dict) else None,
+                'fps': DEFAULT_FPS,
+                'background_color': extra_args.get('background_color', [249, 249, 249]),
+            },
+            'assets': assets,
+            # Expected external calls; image searches fall back Pollinations -> Pexels -> Pixabay
+            'external_calls': {
+                'tts': assets['script'],
+                'image_generation': prompt_images,
+                'image_search_fallback_max': prompt_images * 2,
+                'image_download': prompt_images + url_images,
+                'transcription': 1 if captions_enabled and assets['script'] else 0,
+            },
+        }
+
+
+def plan_video(json_input) -> dict:
+    """Validate a video JSON (dict or file path) and return the render plan report."""
+    if isinstance(json_input, str):
+        with open(json_input, 'r') as f:
+            json_input = json.load(f)
+    return VideoPlanner(json_input).plan()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Validate a video JSON and print its render plan without making any network call.")
+    parser.add_argument('json_path', help="Path to the video JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        report = plan_video(args.json_path)
+    except (OSError, json.JSONDecodeError) as e:
+        report = {'valid': False, 'errors': [str(e)], 'warnings': []}
+
+    print(json.dumps(report, indent=2))
+    return 0 if report['valid'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
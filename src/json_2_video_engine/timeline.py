@@ -0,0 +1,175 @@
+import logging
+
+SCRIPT_TIME_FIELDS = ('start_time', 'voice_start_time', 'voice_end_time', 'end_time')
+ASSET_TIME_FIELDS = ('start_time', 'end_time')
+ASSET_COLLECTIONS = ('videos', 'images', 'text', 'audio')
+ID_KEYS = ('_id', 'image_id', 'video_id', 'audio_id')
+
+
+class TimelineError(ValueError):
+    """Raised for invalid, dangling or circular time references."""
+
+
+class Timeline:
+    """Fully numeric timeline: (collection, index, field) -> seconds."""
+
+    def __init__(self, times: dict):
+        self.times = times
+
+    def get(self, collection: str, index: int, field: str) -> float:
+        return self.times[(collection, index, field)]
+
+    def script_times(self, index: int) -> dict:
+        return {field: self.times[('script', index, field)] for field in SCRIPT_TIME_FIELDS}
+
+    @property
+    def end(self) -> float:
+        ends = [value for (_, _, field), value in self.times.items() if field == 'end_time' and value is not None]
+        return max(ends) if ends else 0.0
+
+
+class TimelineCompiler:
+    """Resolves every symbolic time of a video JSON ("scr_3.end_time") in one pass.
+
+    Items are indexed by id once, references are resolved in dependency order (so forward
+    references and script -> script chains work) and cycles are reported instead of looping.
+    """
+
+    def __init__(self, data: dict):
+        self.data = data
+        self.index = {}  # item id -> (collection, index)
+        for collection in ('script',) + ASSET_COLLECTIONS:
+            for index, item in enumerate(data.get(collection, [])):
+                item_id = next((item[key] for key in ID_KEYS if item.get(key)), None)
+                if item_id is None:
+                    continue
+                if item_id in self.index:
+                    raise TimelineError(f"Duplicate id: {item_id}")
+                self.index[item_id] = (collection, index)
+
+    def compile(self, voice_durations: dict, allow_unknown: bool = False) -> Timeline:
+        """Build the numeric timeline.
+
+        Args:
+            voice_durations (dict): script index -> duration of its voice line in seconds.
+            allow_unknown (bool): Leave times that depend on a missing voice duration as None
+                instead of raising. References are still fully checked.
+        """
+        self.voice_durations = voice_durations
+        self.allow_unknown = allow_unknown
+        self.values = {}
+
+        for index in range(len(self.data.get('script', []))):
+            for field in SCRIPT_TIME_FIELDS:
+                self._resolve(('script', index, field))
+        for collection in ASSET_COLLECTIONS:
+            for index in range(len(self.data.get(collection, []))):
+                for field in ASSET_TIME_FIELDS:
+                    self._resolve((collection, index, field))
+
+        logging.info(f"Timeline compiled: {len(self.values)} times resolved")
+        return Timeline(self.values)
+
+    def _resolve(self, node):
+        # Iterative DFS, long script chains would otherwise hit the recursion limit
+        visiting = set()
+        stack = [node]
+        while stack:
+            current = stack[-1]
+            if current in self.values:
+                stack.pop()
+                continue
+
+            pending = [dep for dep in self._dependencies(current) if dep not in self.values]
+            if not pending:
+                self.values[current] = self._compute(current)
+                visiting.discard(current)
+                stack.pop()
+                continue
+
+            for dep in pending:
+                if dep in visiting:
+                    raise TimelineError(f"Circular time reference: {self._describe(current)} -> {self._describe(dep)}")
+            visiting.add(current)
+            stack.extend(pending)
+
+    def _item(self, node):
+        collection, index, _ = node
+        return self.data[collection][index]
+
+    def _describe(self, node) -> str:
+        collection, index, field = node
+        item = self._item(node)
+        item_id = next((item[key] for key in ID_KEYS if item.get(key)), f"{collection}[{index}]")
+        return f"{item_id}.{field}"
+
+    def _parse_reference(self, node, value):
+        """Return a constant (float) or the node a symbolic time points to."""
+        if isinstance(value, bool):
+            raise TimelineError(f"Invalid {self._describe(node)}: {value}")
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                pass
+            parts = value.rsplit('.', 1)
+            if len(parts) != 2:
+                raise TimelineError(f"Invalid {self._describe(node)}: {value}")
+            item_id, field = parts
+            if item_id not in self.index:
+                raise TimelineError(f"Unknown id in {self._describe(node)}: {value}")
+            collection, index = self.index[item_id]
+            valid_fields = SCRIPT_TIME_FIELDS if collection == 'script' else ASSET_TIME_FIELDS
+            if field not in valid_fields:
+                raise TimelineError(f"Invalid time field in {self._describe(node)}: {value}")
+            return (collection, index, field)
+        raise TimelineError(f"Unable to determine {self._describe(node)}: {value}")
+
+    def _dependencies(self, node) -> list:
+        collection, index, field = node
+        item = self._item(node)
+
+        if collection != 'script':
+            reference = self._parse_reference(node, item.get(field))
+            return [] if isinstance(reference, float) else [reference]
+
+        if field == 'start_time':
+            if 'start_time' in item:
+                reference = self._parse_reference(node, item['start_time'])
+                return [] if isinstance(reference, float) else [reference]
+            # Script items play back to back by default
+            return [('script', index - 1, 'end_time')] if index > 0 else []
+        if field == 'voice_start_time':
+            return [('script', index, 'start_time')]
+        if field == 'voice_end_time':
+            return [('script', index, 'voice_start_time')]
+        return [('script', index, 'voice_end_time')]
+
+    def _compute(self, node):
+        collection, index, field = node
+        item = self._item(node)
+
+        if collection != 'script' or (field == 'start_time' and 'start_time' in item):
+            reference = self._parse_reference(node, item.get(field))
+            return reference if isinstance(reference, float) else self.values[reference]
+
+        if field == 'start_time':
+            return self.values[('script', index - 1, 'end_time')] if index > 0 else 0.0
+
+        if field == 'voice_start_time':
+            base = self.values[('script', index, 'start_time')]
+            return None if base is None else base + float(item.get('voice_start_time', 0))
+
+        if field == 'voice_end_time':
+            base = self.values[('script', index, 'voice_start_time')]
+            duration = self.voice_durations.get(index)
+            if duration is None:
+                if not self.allow_unknown:
+                    raise TimelineError(f"Missing voice duration for {self._describe(node)}")
+                return None
+            return None if base is None else base + duration
+
+        base = self.values[('script', index, 'voice_end_time')]
+        return None if base is None else base + float(item.get('post_pause_duration', 0))
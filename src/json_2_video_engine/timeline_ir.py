@@ -0,0 +1,224 @@
+import math
+import hashlib
+import logging
+
+from PIL import Image
+
+from ..render.video_source import displayed_size, video_infos
+
+DEFAULT_RESOLUTION = {'width': 1920, 'height': 1080}
+DEFAULT_BACKGROUND_COLOR = (249, 249, 249)
+NAMED_COLORS = {'white': (255, 255, 255), 'black': (0, 0, 0)}
+DEFAULT_FPS = 30
+
+# Stacking order used when an item has no z_index (matches the historical clip order)
+DEFAULT_Z = {'video': 0, 'image': 1, 'text': 2}
+
+
+class Layer:
+    """One immutable record of the compiled timeline.
+
+    kind: 'voice' | 'audio' | 'video' | 'image' | 'text'
+    source: file path (audio/video/image), the voice line's "tts:<key>" name or the text content
+    start, end: seconds on the output timeline
+    rect: (center_x, center_y, width, height) in canvas pixels, None for audio. A height
+          of 0 means "fit the content" (text).
+    params: sorted tuple of (key, value) pairs for kind specific options
+    """
+
+    __slots__ = ('kind', 'source', 'start', 'end', 'rect', 'opacity', 'z', 'params')
+
+    def __init__(self, kind, source, start, end, rect=None, opacity=1.0, z=0, params=()):
+        for name, value in zip(self.__slots__, (kind, source, float(start), float(end), rect, float(opacity), z, tuple(sorted(params)))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Layer is immutable")
+
+    def __reduce__(self):
+        # Keeps layers picklable (for worker processes) despite __setattr__ being blocked
+        return (Layer, self.astuple())
+
+    def astuple(self) -> tuple:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __eq__(self, other):
+        return isinstance(other, Layer) and self.astuple() == other.astuple()
+
+    def __hash__(self):
+        return hash(self.astuple())
+
+    def __repr__(self):
+        return f"Layer({', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)})"
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    def param(self, key, default=None):
+        return next((value for name, value in self.params if name == key), default)
+
+
+class TimelineIR:
+    """Immutable, hashable description of a whole video, consumed by the render backends."""
+
+    __slots__ = ('width', 'height', 'fps', 'background_color', 'duration', 'layers', 'captions')
+
+    def __init__(self, width, height, fps, background_color, duration, layers, captions=()):
+        for name, value in zip(self.__slots__, (width, height, fps, tuple(background_color), float(duration), tuple(layers), tuple(sorted(captions)))):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TimelineIR is immutable")
+
+    def __reduce__(self):
+        return (TimelineIR, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __eq__(self, other):
+        return isinstance(other, TimelineIR) and self.digest() == other.digest()
+
+    def __hash__(self):
+        return hash(self.digest())
+
+    @property
+    def size(self) -> tuple:
+        return (self.width, self.height)
+
+    def layers_of(self, kind: str) -> list:
+        return [layer for layer in self.layers if layer.kind == kind]
+
+    def visual_layers(self) -> list:
+        """Video/image/text layers in stacking order (lowest z first)."""
+        return [layer for layer in self.layers if layer.rect is not None]
+
+    def caption_settings(self) -> dict:
+        return dict(self.captions)
+
+    def digest(self) -> str:
+        header = (self.width, self.height, self.fps, self.background_color, self.duration, self.captions)
+        payload = repr(header) + ''.join(repr(layer.astuple()) for layer in self.layers)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _center(position, width, height) -> tuple:
+    return (position[0] / 100 * width, position[1] / 100 * height)
+
+
+class TimelineIRCompiler:
+    """Compiles a video JSON, its numeric timeline and fetched assets into a TimelineIR.
+
+    Canvas size, positions, target sizes and times are worked out once here, so the
+    backends never walk the nested JSON again.
+    """
+
+    def __init__(self, data: dict, timeline, voice_paths: dict, image_paths: dict):
+        self.data = data
+        self.timeline = timeline
+        self.voice_paths = voice_paths  # script index -> voice source name (Speech.source)
+        self.image_paths = image_paths  # image index -> local image path
+
+        extra_args = data.get('extra_args', {})
+        resolution = extra_args.get('resolution', DEFAULT_RESOLUTION)
+        self.width, self.height = resolution['width'], resolution['height']
+
+        background_color = extra_args.get('background_color', DEFAULT_BACKGROUND_COLOR)
+        if isinstance(background_color, str):
+            background_color = NAMED_COLORS.get(background_color.lower(), DEFAULT_BACKGROUND_COLOR)
+        self.background_color = tuple(background_color)
+        self.captions = tuple(extra_args.get('captions', {}).items())
+
+    def compile(self) -> TimelineIR:
+        layers = []
+        layers += self._voice_layers()
+        layers += self._audio_layers()
+        visual = self._video_layers() + self._image_layers() + self._text_layers()
+        # Stable sort keeps the document order between layers of equal z
+        layers += sorted(visual, key=lambda layer: layer.z)
+
+        duration = max((layer.end for layer in layers), default=0.0)
+        ir = TimelineIR(self.width, self.height, DEFAULT_FPS, self.background_color, duration, layers, self.captions)
+        logging.info(f"Timeline IR compiled: {len(layers)} layers, {duration:.2f}s, digest {ir.digest()[:12]}")
+        return ir
+
+    def _voice_layers(self) -> list:
+        layers = []
+        for index, script in enumerate(self.data.get('script', [])):
+            times = self.timeline.script_times(index)
+            layers.append(Layer('voice', self.voice_paths[index], times['voice_start_time'], times['voice_end_time'],
+                                params=(('script_id', script.get('_id', f'script_{index}')),)))
+        return layers
+
+    def _audio_layers(self) -> list:
+        layers = []
+        for index, audio in enumerate(self.data.get('audio', [])):
+            layers.append(Layer('audio', audio['audio_path'],
+                                self.timeline.get('audio', index, 'start_time'), self.timeline.get('audio', index, 'end_time'),
+                                params=(('volume', float(audio['volume'])), ('is_temp', bool(audio.get('is_temp', False))))))
+        return layers
+
+    def _video_layers(self) -> list:
+        layers = []
+        for index, video in enumerate(self.data.get('videos', [])):
+            source_width, source_height = displayed_size(video_infos(video['video_path']))
+            # Videos are scaled to the canvas height
+            height = self.height
+            width = source_width * height / source_height
+            center_x, center_y = _center(video.get('position', [50, 50]), self.width, self.height)
+            layers.append(Layer('video', video['video_path'],
+                                self.timeline.get('videos', index, 'start_time'), self.timeline.get('videos', index, 'end_time'),
+                                rect=(center_x, center_y, width, height), opacity=float(video['opacity']),
+                                z=video.get('z_index', DEFAULT_Z['video']),
+                                params=(('source_start', float(video['start_time'])), ('source_end', float(video['end_time'])),
+                                        ('volume', float(video['volume'])))))
+        return layers
+
+    def _image_layers(self) -> list:
+        layers = []
+        for index, image in enumerate(self.data.get('images', [])):
+            image_path = self.image_paths.get(index)
+            if not image_path:
+                logging.error(f"No image available for {image.get('image_id', index)}, skipping it")
+                continue
+            try:
+                with Image.open(image_path) as img:
+                    source_width, source_height = img.size
+            except Exception as e:
+                logging.error(f"Error processing image {image.get('image_id', 'unknown')}: {str(e)}")
+                continue
+
+            # Handle 'full' argument and determine target dimensions
+            if image.get('max_width') == 'full':
+                target_width = self.width
+            else:
+                target_width = min(int(image.get('max_width', self.width)), self.width)
+
+            if image.get('max_height') == 'full':
+                target_height = self.height
+            else:
+                target_height = min(int(image.get('max_height', self.height)), self.height)
+
+            # Calculate the scaling factor to maintain aspect ratio with 10% zoom
+            scale_factor = min(target_width / source_width, target_height / source_height) * 1.1
+            width = math.ceil(source_width * scale_factor)
+            height = math.ceil(source_height * scale_factor)
+
+            center_x, center_y = _center(image.get('position', [50, 50]), self.width, self.height)
+            params = (('rotation', float(image['rotation'])),) if 'rotation' in image else ()
+            layers.append(Layer('image', image_path,
+                                self.timeline.get('images', index, 'start_time'), self.timeline.get('images', index, 'end_time'),
+                                rect=(center_x, center_y, width, height), opacity=float(image.get('opacity', 1.0)),
+                                z=image.get('z_index', DEFAULT_Z['image']), params=params))
+        return layers
+
+    def _text_layers(self) -> list:
+        layers = []
+        for index, text in enumerate(self.data.get('text', [])):
+            font_size = min(int(text.get('font_size', int(self.height * 0.06))), int(self.height * 0.06))
+            center_x, center_y = _center(text.get('position', [50, 50]), self.width, self.height)
+            layers.append(Layer('text', text.get('content'),
+                                self.timeline.get('text', index, 'start_time'), self.timeline.get('text', index, 'end_time'),
+                                rect=(center_x, center_y, int(self.width * 0.8), 0),
+                                z=text.get('z_index', DEFAULT_Z['text']),
+                                params=(('font', text.get('font', 'Arial')), ('font_size', font_size),
+                                        ('color', text.get('color', 'white')), ('shadow_color', text.get('shadow_color', 'black')))))
+        return layers
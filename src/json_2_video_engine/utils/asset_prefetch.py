@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+from .llm_calls import generate_voice
+from .images_generation import search_pexels_images, search_pixabay_images, download_image, generate_image_pollinations
+
+# Max number of in-flight requests per provider
+DEFAULT_PROVIDER_LIMITS = {
+    'tts': 4,
+    'pollinations': 4,
+    'pexels': 2,
+    'pixabay': 2,
+    'download': 6,
+}
+
+
+class PrefetchedAssets:
+    """Finished assets keyed by the index of their item in the JSON ('script' / 'images')."""
+
+    def __init__(self):
+        self.voices = {}  # script index -> in-memory Speech of the voice line
+        self.images = {}  # image index -> local image path (None if no image was found)
+        self.errors = {}  # ('script' | 'images', index) -> exception
+
+
+class AssetPrefetcher:
+    """Starts every TTS and image request of a video JSON at once.
+
+    TTS goes through the async gateway and the blocking image providers run in worker threads;
+    a semaphore per provider caps how many of them are in flight, so the total wait is set by
+    the slowest asset instead of the sum.
+    """
+
+    def __init__(self, provider_limits: dict = None):
+        limits = {**DEFAULT_PROVIDER_LIMITS, **(provider_limits or {})}
+        self.semaphores = {provider: asyncio.Semaphore(limit) for provider, limit in limits.items()}
+
+    async def _call(self, provider: str, func, *args):
+        async with self.semaphores[provider]:
+            return await asyncio.to_thread(func, *args)
+
+    async def fetch_voice(self, text: str):
+        async with self.semaphores['tts']:
+            speech = await generate_voice(text)
+        if speech is None:
+            raise RuntimeError(f"Voice generation failed for: {text}")
+        return speech
+
+    async def fetch_image(self, image: dict):
+        """Resolve an image item to a local file, None if no image was found for a prompt."""
+        source_type = image.get('source_type', 'prompt')
+
+        if source_type == 'path':
+            return image['source_content']
+        elif source_type == 'prompt':
+            query = image['source_content']
+            # Try different image sources in sequence
+            image_urls = await self._call('pollinations', generate_image_pollinations, query)
+            if not image_urls:
+                logging.info("Trying Pexels as fallback...")
+                image_urls = await self._call('pexels', search_pexels_images, query)
+            if not image_urls:
+                logging.info("Trying Pixabay as final fallback...")
+                image_urls = await self._call('pixabay', search_pixabay_images, query)
+
+            if not image_urls:
+                logging.error(f"No images found for prompt: {query}")
+                return None
+            return await self._call('download', download_image, image_urls[0])
+        elif source_type == 'url':
+            return await self._call('download', download_image, image['source_content'])
+
+        raise ValueError(f"Unknown source_type: {source_type}")
+
+    async def prefetch(self, data: dict, assets: PrefetchedAssets = None) -> PrefetchedAssets:
+        """Fetch every asset of data that isn't already in assets (e.g. produced while the JSON was being written)."""
+        assets = assets or PrefetchedAssets()
+        scripts = [index for index in range(len(data.get('script', [])))
+                   if index not in assets.voices and ('script', index) not in assets.errors]
+        images = [index for index in range(len(data.get('images', [])))
+                  if index not in assets.images and ('images', index) not in assets.errors]
+
+        tasks = [self.fetch_voice(data['script'][index]['text']) for index in scripts]
+        tasks += [self.fetch_image(data['images'][index]) for index in images]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        for index, result in zip(scripts, results[:len(scripts)]):
+            if isinstance(result, Exception):
+                assets.errors[('script', index)] = result
+            else:
+                assets.voices[index] = result
+
+        for index, result in zip(images, results[len(scripts):]):
+            if isinstance(result, Exception):
+                assets.errors[('images', index)] = result
+            else:
+                assets.images[index] = result
+
+        logging.info(f"Prefetched {len(assets.voices)} voices and {len(assets.images)} images ({len(assets.errors)} failed)")
+        return assets
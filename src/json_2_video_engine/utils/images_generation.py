@@ -2,13 +2,11 @@ import os
 import uuid
 import logging
 from dotenv import load_dotenv
-from openai import OpenAI
 import requests
 
 # Load environment variables from .env file
 load_dotenv()
 
-openai_client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 pexels_api_key = os.getenv("PEXELS_API_KEY")
 pixabay_api_key = os.getenv("PIXABAY_API_KEY") or ''
 
@@ -101,7 +99,7 @@ def search_pexels_images(query):
 
     search_results = response.json()
     image_urls = [photo['src']['original'] for photo in search_results.get('photos', [])]  # Extract image URLs
-    return image_urls[0]
+    return image_urls
 
 def search_pixabay_images(query):
     """Search for images using Pixabay API and return the URLs."""
@@ -126,4 +124,4 @@ def search_pixabay_images(query):
 
     search_results = response.json()
     image_urls = [hit['largeImageURL'] for hit in search_results.get('hits', [])]  # Extract image URLs
-    return image_urls[0]
+    return image_urls
@@ -1,13 +1,14 @@
 import json
 import os
 import logging
-from openai import OpenAI
 
 from dotenv import load_dotenv
 
+from ...llm.gateway import gateway
+from .json_repair import repair_video_json
+
 load_dotenv()
 
-client = OpenAI(api_key=os.getenv('OPENAI_API_KEY'))
 reference_json_path = os.path.join(os.path.dirname(__file__), '..', 'json_templates', 'json2video_storytelling.json')
 
 def json_raw_generation(reference_json: dict, instructions: str, elements_to_include: list = None):
@@ -33,7 +34,8 @@ def json_raw_generation(reference_json: dict, instructions: str, elements_to_inc
             {"role": "user", "content": f"Please generate a similar JSON structure based on the following instructions:\n\n{instructions}"}
         ]
 
-    response = client.chat.completions.create(
+    response = gateway.chat_sync(
+        cache=False,  # a new video every time
         model="gpt-3.5-turbo-0125",
         messages=messages,
         max_tokens=2000,
@@ -46,8 +48,10 @@ def json_raw_generation(reference_json: dict, instructions: str, elements_to_inc
 
     return generated_json
 
-def json_verification(reference_json: dict, generated_json: dict, elements_to_include: list = []):
+def json_verification(reference_json: dict, generated_json: dict, elements_to_include: list = [], known_errors: list = None):
     parsed_json = json.loads(generated_json) if isinstance(generated_json, str) else generated_json
+    # Problems the local repair already found but couldn't fix
+    known_errors_text = "\n".join(f"    - {error}" for error in known_errors) if known_errors else ""
 
     instructions = f"""Instructions:
     1. Ensure all required elements (images, text(optional), script) are present.
@@ -60,13 +64,18 @@ def json_verification(reference_json: dict, generated_json: dict, elements_to_in
 
     In case something is not correct, please fix it. And return the corrected JSON structure.
     """
+    if known_errors_text:
+        instructions += f"""
+    The JSON structure was already checked and these problems are still left. Fix them and keep everything else as it is:
+{known_errors_text}
+    """
 
     prompt = f"""
     Reference JSON structure:\n{json.dumps(reference_json, indent=2)}
     JSON structure to verify:\n{json.dumps(parsed_json, indent=2)}
     """
 
-    verification = client.chat.completions.create(
+    verification = gateway.chat_sync(
         model="gpt-3.5-turbo-0125",
         messages=[
             {"role": "system", "content": f"You are an AI assistant specialized in verifying JSON structures for a video creation engine that uses a static JSON structure(images, text, script). \n {instructions}"},
@@ -87,7 +96,13 @@ def generate_json_for_video(instructions: str, elements_to_include: list = None)
         reference_json = json.load(file)
 
     generated_json = json_raw_generation(reference_json, instructions, elements_to_include)
-    verified_json = json_verification(reference_json, generated_json, elements_to_include)
+
+    # The rules are checked and repaired locally, the model only sees what can't be fixed here
+    report = repair_video_json(generated_json, elements_to_include)
+    if report['valid']:
+        return report['data']
+    logging.warning(f"Generated JSON could not be repaired locally ({'; '.join(report['errors'])}), asking the model to verify it")
+    verified_json = json_verification(reference_json, report['data'], elements_to_include, report['errors'])
 
     return verified_json
 
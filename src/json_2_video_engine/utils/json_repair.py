@@ -0,0 +1,206 @@
+import re
+import copy
+import logging
+
+from ..planner import VideoPlanner
+
+MIN_IMAGES = 3
+MIN_SCRIPT_WORDS = 100
+# Speaking rate used to place hard-coded times on the script before any voice exists
+WORDS_PER_SECOND = 2.5
+# Source types the generation prompts allow; the engine also takes 'url', but generated JSON must not use it
+SOURCE_TYPES = ('prompt', 'path')
+# Items whose times must follow the script; video and audio times are plain seconds
+SYNCED_COLLECTIONS = ('images', 'text')
+
+# 'scr_1.start_time', '["scr_1"].start_time', "['scr_1'].end_time", '[scr_1].end_time'
+_REFERENCE = re.compile(r'''^\s*\[?\s*["']?([^"'\[\]]+?)["']?\s*\]?\.(\w+)\s*$''')
+
+
+def _as_number(value):
+    """value as seconds when it is a hard-coded time, else None."""
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class VideoJsonRepairer:
+    """Checks a generated video JSON against the generation rules and fixes what it can, locally.
+
+    Replaces the second LLM round trip that used to verify every generated JSON: the script must
+    be present, image and text timings must reference script ids, there must be at least
+    MIN_IMAGES images, every source_type must be prompt or path (path only for elements_to_include)
+    and at least one of elements_to_include must be used.
+    Everything is deterministic; only what can't be repaired is reported as an error, for the
+    caller to hand over to the model.
+    """
+
+    def __init__(self, data: dict, elements_to_include: list = None):
+        self.data = copy.deepcopy(data)
+        self.element_paths = [element.get('path') for element in (elements_to_include or []) if isinstance(element, dict)]
+        self.repairs = []
+        self.errors = []
+        self.warnings = []
+
+    def repair(self) -> dict:
+        if not isinstance(self.data, dict):
+            self.errors.append("JSON root must be an object")
+            return self._report()
+
+        self._repair_script()
+        if not self.data['script']:
+            self.errors.append("No script with text")
+            return self._report()
+        self._repair_images()
+        for collection in SYNCED_COLLECTIONS:
+            self._repair_times(collection)
+        self._add_missing_images()
+        self._check_elements()
+
+        report = VideoPlanner(self.data).plan()
+        self.errors.extend(report['errors'])
+        return self._report()
+
+    def _list(self, collection: str) -> list:
+        items = self.data.get(collection)
+        if items is None:
+            items = self.data[collection] = []
+        elif not isinstance(items, list):
+            self.repairs.append(f"Dropped '{collection}', it wasn't a list")
+            items = self.data[collection] = []
+        return items
+
+    def _repair_script(self):
+        scripts = []
+        for index, script in enumerate(self._list('script')):
+            if not isinstance(script, dict) or not isinstance(script.get('text'), str) or not script['text'].strip():
+                self.repairs.append(f"Dropped script[{index}] without text")
+                continue
+            scripts.append(script)
+
+        ids = set()
+        for index, script in enumerate(scripts):
+            if not isinstance(script.get('_id'), str) or not script['_id'] or script['_id'] in ids:
+                script['_id'] = self._new_id('scr', index, ids)
+                self.repairs.append(f"Gave script[{index}] the id {script['_id']}")
+            ids.add(script['_id'])
+        self.data['script'] = scripts
+
+        words = sum(len(script['text'].split()) for script in scripts)
+        if words < MIN_SCRIPT_WORDS:
+            self.warnings.append(f"The script is only {words} words long")
+
+        # Estimated (start, end) of every script item, to place hard-coded times
+        self.spans, start = [], 0.0
+        for script in scripts:
+            end = start + len(script['text'].split()) / WORDS_PER_SECOND
+            self.spans.append((start, end))
+            start = end
+
+    def _repair_images(self):
+        images = []
+        for index, image in enumerate(self._list('images')):
+            if not isinstance(image, dict) or not isinstance(image.get('source_content'), str) or not image['source_content'].strip():
+                self.repairs.append(f"Dropped images[{index}] without source_content")
+                continue
+            source_type = image.get('source_type', 'prompt')
+            if source_type == 'url':
+                self.repairs.append(f"Dropped images[{index}], source_type 'url' isn't allowed")
+                continue
+            if source_type not in SOURCE_TYPES:
+                self.repairs.append(f"images[{index}]: source_type {source_type!r} replaced by 'prompt'")
+                image['source_type'] = 'prompt'
+            elif source_type == 'path' and image['source_content'] not in self.element_paths:
+                self.repairs.append(f"Dropped images[{index}], its path {image['source_content']!r} isn't one of the elements to include")
+                continue
+            images.append(image)
+        self.data['images'] = images
+
+    def _repair_times(self, collection: str):
+        items = [item for item in self._list(collection) if isinstance(item, dict)]
+        ids = {script['_id']: script for script in self.data['script']}
+        for index, item in enumerate(items):
+            for field in ('start_time', 'end_time'):
+                value = item.get(field)
+                match = _REFERENCE.match(value) if isinstance(value, str) else None
+                if match and match.group(1) in ids and match.group(2) in ('start_time', 'voice_start_time', 'voice_end_time', 'end_time'):
+                    reference = f"{match.group(1)}.{match.group(2)}"
+                    if reference != value:
+                        item[field] = reference
+                        self.repairs.append(f"{collection}[{index}].{field}: {value!r} rewritten as {reference!r}")
+                    continue
+                script_index = self._script_at(_as_number(value), field, index, len(items))
+                item[field] = f"{self.data['script'][script_index]['_id']}.{field}"
+                self.repairs.append(f"{collection}[{index}].{field}: {value!r} rewritten as {item[field]!r}")
+
+            # A start referencing a later script than the end would end before it starts
+            start_index, end_index = self._script_index(item['start_time']), self._script_index(item['end_time'])
+            if end_index < start_index:
+                item['end_time'] = f"{self.data['script'][start_index]['_id']}.end_time"
+                self.repairs.append(f"{collection}[{index}].end_time moved to the end of its start script")
+        self.data[collection] = items
+
+    def _script_at(self, seconds, field: str, index: int, count: int) -> int:
+        """The script item a hard-coded time falls in, or by position when there is no usable time."""
+        if seconds is None:
+            return min(index * len(self.spans) // max(count, 1), len(self.spans) - 1)
+        if field == 'start_time':
+            return max(i for i, (start, _) in enumerate(self.spans) if start <= seconds or i == 0)
+        return next((i for i, (_, end) in enumerate(self.spans) if end >= seconds), len(self.spans) - 1)
+
+    def _script_index(self, reference: str):
+        item_id = reference.rsplit('.', 1)[0]
+        return next((i for i, script in enumerate(self.data['script']) if script['_id'] == item_id), None)
+
+    def _add_missing_images(self):
+        images = self.data['images']
+        covered = {self._script_index(image['start_time']) for image in images}
+        ids = {image.get('image_id') for image in images}
+        for index, script in enumerate(self.data['script']):
+            if len(images) >= MIN_IMAGES:
+                break
+            if index in covered:
+                continue
+            images.append({
+                "image_id": self._new_id('image', len(images), ids),
+                "source_type": "prompt",
+                "source_content": script['text'],
+                "start_time": f"{script['_id']}.start_time",
+                "end_time": f"{script['_id']}.end_time",
+            })
+            ids.add(images[-1]['image_id'])
+            self.repairs.append(f"Added an image for {script['_id']}")
+        if len(images) < MIN_IMAGES:
+            self.errors.append(f"Only {len(images)} images, at least {MIN_IMAGES} are needed")
+
+    def _check_elements(self):
+        """The prompts ask for one or more of the elements to include; _repair_images already dropped any other path."""
+        used = {image['source_content'] for image in self.data['images'] if image.get('source_type') == 'path'}
+        if self.element_paths and not used & set(self.element_paths):
+            self.errors.append(f"None of the elements to include is used: {', '.join(map(str, self.element_paths))}")
+
+    @staticmethod
+    def _new_id(prefix: str, index: int, taken: set) -> str:
+        while f"{prefix}_{index}" in taken:
+            index += 1
+        return f"{prefix}_{index}"
+
+    def _report(self) -> dict:
+        return {
+            'valid': not self.errors,
+            'data': self.data,
+            'repairs': self.repairs,
+            'errors': self.errors,
+            'warnings': self.warnings,
+        }
+
+
+def repair_video_json(data: dict, elements_to_include: list = None) -> dict:
+    """Check and repair a generated video JSON; report['data'] is usable when report['valid']."""
+    report = VideoJsonRepairer(data, elements_to_include).repair()
+    for repair in report['repairs']:
+        logging.info(f"Video JSON repaired: {repair}")
+    return report
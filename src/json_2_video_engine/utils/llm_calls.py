@@ -1,28 +1,12 @@
-import os
-import uuid
 import logging
-from dotenv import load_dotenv
-from openai import OpenAI
 
-# Load environment variables from .env file
-load_dotenv()
-
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+from ...tts.speech import synthesize_speech_async
 
 async def generate_voice(script):
+    """TTS call through the shared gateway, returns the voice line as an in-memory Speech (None on failure)."""
     try:
-        unique_id = uuid.uuid4()
-        assets_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'assets', 'audios')
-        os.makedirs(assets_dir, exist_ok=True)
-        speech_file_path = os.path.join(assets_dir, f"voice_{unique_id}.mp3")
-        
-        response = client.audio.speech.create(
-            model="tts-1",
-            voice="echo",
-            input=script
-        )
-        response.stream_to_file(speech_file_path)
+        speech = await synthesize_speech_async(script, model="tts-1", voice="echo")
         logging.info("Voice generated successfully.")
-        return speech_file_path
+        return speech
     except Exception as e:
         logging.error(f"Error generating voice: {e}")
@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import random
+import asyncio
+import logging
+import threading
+import weakref
+
+from dotenv import load_dotenv
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, RateLimitError, InternalServerError
+from openai.types.chat import ChatCompletion
+
+from .response_cache import llm_cache
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Max in-flight requests per endpoint
+DEFAULT_ENDPOINT_LIMITS = {
+    'chat': 8,
+    'speech': 4,
+    'transcription': 2,
+}
+DEFAULT_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+
+# Worth another try: dropped connections and timeouts (APITimeoutError is an APIConnectionError), 429 and 5xx
+TRANSIENT_ERRORS = (APIConnectionError, RateLimitError, InternalServerError)
+
+
+def backoff_delay(attempt: int, error: Exception = None) -> float:
+    """Full-jitter exponential backoff, never shorter than the server's Retry-After."""
+    delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+    response = getattr(error, 'response', None)
+    try:
+        retry_after = float(response.headers.get('retry-after')) if response is not None else 0.0
+    except (TypeError, ValueError):
+        retry_after = 0.0
+    return max(delay, min(retry_after, BACKOFF_MAX))
+
+
+class OpenAIGateway:
+    """The one way to the OpenAI API for every engine.
+
+    Async callers share one pooled AsyncOpenAI client per event loop (the GUI starts a new
+    loop with every asyncio.run), so awaiting several calls with asyncio.gather really runs
+    them concurrently. Code on worker threads uses the blocking *_sync methods, backed by a
+    single thread-safe OpenAI client. Both sides cap in-flight requests per endpoint, time
+    out, and retry transient errors with jittered backoff (the SDK's own retries are off
+    so the two don't stack). Chat completions are cached on disk (see LLMResponseCache).
+    """
+
+    def __init__(self, api_key: str = None, timeout: float = DEFAULT_TIMEOUT, max_retries: int = DEFAULT_MAX_RETRIES,
+                 endpoint_limits: dict = None):
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.endpoint_limits = {**DEFAULT_ENDPOINT_LIMITS, **(endpoint_limits or {})}
+        self._lock = threading.Lock()
+        self._loops = weakref.WeakKeyDictionary()  # event loop -> (AsyncOpenAI, {endpoint: asyncio.Semaphore})
+        self._client = None
+        self._thread_limits = {endpoint: threading.BoundedSemaphore(limit) for endpoint, limit in self.endpoint_limits.items()}
+
+    def _client_args(self) -> dict:
+        return dict(api_key=self.api_key or os.getenv("OPENAI_API_KEY"), timeout=self.timeout, max_retries=0)
+
+    def _async_state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loops.get(loop)
+        if state is None:
+            semaphores = {endpoint: asyncio.Semaphore(limit) for endpoint, limit in self.endpoint_limits.items()}
+            state = self._loops[loop] = (AsyncOpenAI(**self._client_args()), semaphores)
+        return state
+
+    @property
+    def client(self) -> OpenAI:
+        """The shared blocking client."""
+        with self._lock:
+            if self._client is None:
+                self._client = OpenAI(**self._client_args())
+            return self._client
+
+    async def _call(self, endpoint: str, request):
+        client, semaphores = self._async_state()
+        for attempt in range(self.max_retries + 1):
+            async with semaphores[endpoint]:
+                try:
+                    return await request(client)
+                except TRANSIENT_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay, error = backoff_delay(attempt, e), type(e).__name__
+            # Back off without holding the endpoint slot
+            logging.warning(f"OpenAI {endpoint} request failed ({error}), retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+
+    def _call_sync(self, endpoint: str, request):
+        for attempt in range(self.max_retries + 1):
+            with self._thread_limits[endpoint]:
+                try:
+                    return request(self.client)
+                except TRANSIENT_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay, error = backoff_delay(attempt, e), type(e).__name__
+            logging.warning(f"OpenAI {endpoint} request failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+    @staticmethod
+    def _cacheable(content, finish_reason, kwargs: dict, validate=None) -> bool:
+        """Whether an answer may be replayed: it ran to the end and its content passes validate.
+
+        validate(content) raises (e.g. ValueError) for content the caller can't use. Requests
+        for a json_object response are checked to be JSON in any case.
+        """
+        if finish_reason != 'stop':
+            return False
+        try:
+            if (kwargs.get('response_format') or {}).get('type') == 'json_object':
+                json.loads(content)
+            if validate is not None:
+                validate(content)
+        except Exception as e:
+            logging.warning(f"Not caching the chat answer, it failed validation: {e}")
+            return False
+        return True
+
+    @classmethod
+    def _cached_completion(cls, cache: bool, kwargs: dict, validate=None):
+        """(cache key, cached ChatCompletion or None); the key is None when caching doesn't apply."""
+        if not cache or not llm_cache.enabled or kwargs.get('stream'):
+            return None, None
+        key = llm_cache.make_key('chat', kwargs)
+        value = llm_cache.get(key)
+        if value is None:
+            return key, None
+        completion = ChatCompletion.model_validate_json(value)
+        # Entries stored before answers were validated may be unusable, ask again for those
+        if not cls._cacheable_completion(completion, kwargs, validate):
+            return key, None
+        logging.info(f"LLM cache hit: {key[:12]}")
+        return key, completion
+
+    @classmethod
+    def _cacheable_completion(cls, completion: ChatCompletion, kwargs: dict, validate=None) -> bool:
+        if not completion.choices:
+            return False
+        choice = completion.choices[0]
+        return cls._cacheable(choice.message.content, choice.finish_reason, kwargs, validate)
+
+    def _store_completion(self, key, completion: ChatCompletion, kwargs: dict, validate=None):
+        if key and self._cacheable_completion(completion, kwargs, validate):
+            llm_cache.put(key, completion.model_dump_json())
+
+    async def chat(self, cache: bool = True, validate=None, **kwargs):
+        """chat.completions.create, answered from llm_cache when the same request was made before.
+
+        cache=False always asks the model (and doesn't store the answer), for when a fresh
+        completion is the point. Only complete answers that pass validate(content) are stored
+        (see _cacheable), so a rejected answer is asked for again next time. The SQLite work
+        runs on a worker thread.
+        """
+        key, completion = await asyncio.to_thread(self._cached_completion, cache, kwargs, validate)
+        if completion is None:
+            completion = await self._call('chat', lambda client: client.chat.completions.create(**kwargs))
+            await asyncio.to_thread(self._store_completion, key, completion, kwargs, validate)
+        return completion
+
+    async def stream_chat(self, cache: bool = True, validate=None, **kwargs):
+        """Streaming chat.completions.create: an async iterator over the content as it is written.
+
+        Only opening the stream is retried: once content has been handed out a retry would
+        repeat it. A finished stream that passes validate, as in chat, is cached as its whole
+        content, which a hit yields in one piece.
+        """
+        key = llm_cache.make_key('chat_stream', kwargs) if cache and llm_cache.enabled else None
+        cached = await asyncio.to_thread(llm_cache.get, key) if key else None
+        if cached is not None:
+            cached = json.loads(cached)
+            if self._cacheable(cached, 'stop', kwargs, validate):
+                logging.info(f"LLM cache hit: {key[:12]}")
+                yield cached
+                return
+
+        client, semaphores = self._async_state()
+        content, finish_reason = [], None
+        async with semaphores['chat']:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    stream = await client.chat.completions.create(stream=True, **kwargs)
+                    break
+                except TRANSIENT_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    delay = backoff_delay(attempt, e)
+                    logging.warning(f"OpenAI chat stream failed to open ({type(e).__name__}), retrying in {delay:.1f}s")
+                    await asyncio.sleep(delay)
+            try:
+                async for chunk in stream:
+                    if not chunk.choices:
+                        continue
+                    finish_reason = chunk.choices[0].finish_reason or finish_reason
+                    piece = chunk.choices[0].delta.content
+                    if piece:
+                        content.append(piece)
+                        yield piece
+            finally:
+                await stream.close()
+        content = ''.join(content)
+        if key and self._cacheable(content, finish_reason, kwargs, validate):
+            await asyncio.to_thread(llm_cache.put, key, json.dumps(content))
+
+    async def speech(self, **kwargs) -> bytes:
+        """audio.speech.create, returning the audio bytes."""
+        async def request(client):
+            response = await client.audio.speech.create(**kwargs)
+            return response.content
+        return await self._call('speech', request)
+
+    async def transcribe(self, **kwargs):
+        """audio.transcriptions.create; pass file as (name, bytes) so a retry can resend it."""
+        return await self._call('transcription', lambda client: client.audio.transcriptions.create(**kwargs))
+
+    def chat_sync(self, cache: bool = True, validate=None, **kwargs):
+        key, completion = self._cached_completion(cache, kwargs, validate)
+        if completion is None:
+            completion = self._call_sync('chat', lambda client: client.chat.completions.create(**kwargs))
+            self._store_completion(key, completion, kwargs, validate)
+        return completion
+
+
+# Shared instance used by every engine
+gateway = OpenAIGateway(
+    timeout=float(os.getenv('OPENAI_TIMEOUT') or DEFAULT_TIMEOUT),
+    max_retries=int(os.getenv('OPENAI_MAX_RETRIES') or DEFAULT_MAX_RETRIES),
+)
@@ -0,0 +1,96 @@
+import os
+import json
+import time
+import sqlite3
+import contextlib
+import hashlib
+import logging
+import threading
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets', 'llm_cache.sqlite3')
+
+
+class LLMResponseCache:
+    """Persistent cache of chat completions in a local SQLite file.
+
+    Entries are keyed by hash(endpoint, model, messages, params), expire after ttl seconds
+    and are evicted least-recently-used past max_entries. Values are the JSON of the
+    response object, so a hit gives the caller exactly what the API returned.
+    """
+
+    def __init__(self, path: str = None, ttl: float = 30 * 24 * 3600, max_entries: int = 5000, enabled: bool = True):
+        self.path = path or DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @staticmethod
+    def make_key(endpoint: str, params: dict) -> str:
+        payload = json.dumps([endpoint, params], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """A connection committing on success; the table is created on first use."""
+        if not self._ready:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=10)
+        try:
+            with connection:
+                if not self._ready:
+                    connection.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                                       "created REAL NOT NULL, accessed REAL NOT NULL)")
+                    self._ready = True
+                yield connection
+        finally:
+            connection.close()
+
+    def get(self, key: str):
+        """The cached JSON for key (marking it as recently used), None on a miss or an expired entry."""
+        now = time.time()
+        with self._lock:
+            try:
+                with self._connection() as connection:
+                    row = connection.execute("SELECT value FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)).fetchone()
+                    if row is not None:
+                        connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            except sqlite3.Error as e:
+                logging.error(f"LLM cache read failed: {e}")
+                return None
+        return row[0] if row else None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            try:
+                with self._connection() as connection:
+                    connection.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)", (key, value, now, now))
+                    self._evict(connection, now)
+            except sqlite3.Error as e:
+                logging.error(f"LLM cache write failed: {e}")
+
+    def _evict(self, connection: sqlite3.Connection, now: float):
+        """Drop expired entries, then the least recently used ones past max_entries."""
+        connection.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+        connection.execute("DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                           (self.max_entries,))
+
+    def clear(self):
+        with self._lock, self._connection() as connection:
+            connection.execute("DELETE FROM responses")
+
+
+# Shared instance used by the gateway
+llm_cache = LLMResponseCache(
+    path=os.getenv('LLM_CACHE_PATH') or None,
+    ttl=float(os.getenv('LLM_CACHE_TTL_DAYS') or 30) * 24 * 3600,
+    max_entries=int(os.getenv('LLM_CACHE_MAX_ENTRIES') or 5000),
+    enabled=(os.getenv('LLM_CACHE_ENABLED') or 'true').lower() != 'false',
+)
@@ -0,0 +1,141 @@
+import re
+import json
+import logging
+
+# One request for what used to be create_scenes_from_script, gpt_summary_of_script and a
+# gpt_image_prompt_from_scene call per scene. The summary comes first so it is written before the scenes.
+STORYBOARD_PROMPT = """ You are a storyboard system for a video automation tool. Your task is to summarize a given script, break it down into a sequence of concise, well-structured scenes, and write an image prompt for every scene.
+
+    **Guidelines:**
+    1. Summarize the whole script in one line.
+    2. Divide the script into self-contained scenes, each 15-20 words long.
+    3. Preserve the original text and structure of the script in the scenes.
+    4. Ensure each scene reads naturally on its own to enable seamless image and audio generation without abrupt transitions.
+    5. For every scene write a concise image prompt that prioritizes the details in the scene text, with specific sensory details (lighting, atmosphere, motion), emotions, actions or vivid backgrounds that match the scene and the summary. Avoid corporate or static imagery.
+    6. Never ask for text within the images; describe only the visual content.
+
+    **Example image prompts:**
+    - "Three friends laughing and dancing on a beach at sunset in California, waves in the background"
+    - "Kids in fun Halloween costumes, smiling and posing excitedly at a colorful McDonald's"
+
+    **Output Format:**
+    Return the output as a JSON object with the following structure:
+    {
+        "summary": "one line summary of the script",
+        "scenes": [
+            {"text": "text of scene 1", "image_prompt": "image prompt for scene 1"},
+            {"text": "text of scene 2", "image_prompt": "image prompt for scene 2"}
+        ]
+    }
+"""
+
+_SUMMARY = re.compile(r'"summary"\s*:\s*("(?:[^"\\]|\\.)*")')
+_SCENES = re.compile(r'"scenes"\s*:\s*\[')
+
+
+def _text(value):
+    """value stripped if it is a non-empty string, else None."""
+    return (value.strip() or None) if isinstance(value, str) else None
+
+
+def parse_scene(item):
+    """(text, image_prompt) of one storyboard scene; image_prompt is None when missing or invalid.
+
+    Raises ValueError when the scene has no text.
+    """
+    if isinstance(item, str):
+        item = {'text': item}
+    text = _text(item.get('text')) if isinstance(item, dict) else None
+    if text is None:
+        raise ValueError(f"Storyboard scene without text: {item!r}")
+    return text, _text(item.get('image_prompt'))
+
+
+def parse_storyboard(content: str):
+    """Validate a storyboard response: (summary, scenes, image_prompts).
+
+    summary and the entries of image_prompts are None where the model left them out, so the
+    caller can ask for just those again. Raises ValueError when the scenes themselves are
+    unusable (not JSON, no scene list, or a scene without text).
+    """
+    try:
+        data = json.loads(content)
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Storyboard is not valid JSON: {e}")
+    if not isinstance(data, dict) or not isinstance(data.get('scenes'), list) or not data['scenes']:
+        raise ValueError("Storyboard has no scenes")
+
+    scenes, image_prompts = [], []
+    for item in data['scenes']:
+        text, image_prompt = parse_scene(item)
+        scenes.append(text)
+        image_prompts.append(image_prompt)
+    return _text(data.get('summary')), scenes, image_prompts
+
+
+class StoryboardParser:
+    """Incremental parsing of a streamed storyboard response.
+
+    feed() takes the content as it arrives and returns the (text, image_prompt) of every
+    scene whose JSON element was completed by it; summary is set as soon as its string is
+    closed. Scenes without text are logged and skipped.
+    """
+
+    def __init__(self):
+        self.buffer = ''
+        self.summary = None
+        self.done = False  # the scene list is closed
+        self._position = None  # next character to scan inside the scene list, None until it starts
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = None  # where the element being scanned starts
+
+    def feed(self, content: str) -> list:
+        self.buffer += content
+        if self.summary is None:
+            match = _SUMMARY.search(self.buffer)
+            if match:
+                self.summary = _text(json.loads(match.group(1)))
+        if self._position is None:
+            match = _SCENES.search(self.buffer)
+            if not match:
+                return []
+            self._position = match.end()
+
+        scenes = []
+        while self._position < len(self.buffer) and not self.done:
+            char = self.buffer[self._position]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._depth == 0:
+                        self._complete(scenes)
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 0:
+                    self._start = self._position
+            elif char in '{[':
+                if self._depth == 0:
+                    self._start = self._position
+                self._depth += 1
+            elif char in '}]':
+                if self._depth == 0:
+                    self.done = True
+                else:
+                    self._depth -= 1
+                    if self._depth == 0:
+                        self._complete(scenes)
+            self._position += 1
+        return scenes
+
+    def _complete(self, scenes: list):
+        element = self.buffer[self._start:self._position + 1]
+        try:
+            scenes.append(parse_scene(json.loads(element)))
+        except ValueError as e:
+            logging.error(f"Skipping storyboard scene: {e}")
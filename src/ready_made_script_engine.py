@@ -1,8 +1,8 @@
 import yaml
+import asyncio
 import logging
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip, TextClip, CompositeAudioClip, ColorClip
+from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip, CompositeAudioClip, ColorClip
 import random
-from openai import OpenAI
 import os
 
 # Set up logging
@@ -11,6 +11,9 @@ logging.basicConfig(level=logging.INFO)
 from .image_handler import ImageHandler
 from .video_editor import VideoEditor
 from .captions.caption_handler import CaptionHandler
+from .captions.text_renderer import text_renderer
+from .tts.speech import Speech
+from .llm.gateway import gateway
 
 # Update the config loading to use the correct path
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -19,56 +22,38 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 openai_api_key = os.getenv('OPENAI_API_KEY')
 pexels_api_key = os.getenv('PEXELS_API_KEY')
 
-openai = OpenAI(api_key=openai_api_key)
-
 class ReadyMadeScriptGenerator:
     def __init__(self):
         self.video_editor: VideoEditor = VideoEditor()
         self.image_handler: ImageHandler = ImageHandler(pexels_api_key, openai_api_key)
         self.caption_handler: CaptionHandler = CaptionHandler()
 
-    def gpt_summary_of_script(self, video_script: str) -> str:
-        try:
-            completion = openai.chat.completions.create(
-                model="gpt-3.5-turbo-0125",
-                temperature=0.25,
-                max_tokens=250,
-                messages=[
-                    {"role": "user", "content": f"Summarize the following video script; it is very important that you keep it to one line. \n Script: {video_script}"}
-                ]
-            )
-            logging.info("Script generated successfully.")
-            return completion.choices[0].message.content
-        except Exception as e:
-            logging.error(f"Error generating script summary: {e}")
-            return ""  # Return an empty string on error
+    async def gpt_summary_of_script(self, video_script: str) -> str:
+        # Same prompt as VideoEditor's, so both share cached answers
+        return await self.video_editor.gpt_summary_of_script(video_script)
 
-    async def create_hook_text_clip(self, hook: str, video_height: int = 720) -> tuple[TextClip, str]:
+    async def create_hook_text_clip(self, hook: str, video_height: int = 720) -> tuple[ImageClip, Speech]:
         """Create a text clip for the hook and generate its audio."""
         try:
             # Generate audio for the hook
-            hook_audio_path: str = await self.video_editor.generate_voice(hook)
-
-            hook_audio_clip: AudioFileClip = AudioFileClip(hook_audio_path)
-            hook_audio_duration: float = hook_audio_clip.duration
-            hook_audio_clip.close()
+            hook_speech: Speech = await self.video_editor.generate_voice(hook)
+            hook_audio_duration: float = hook_speech.duration  # known without reading any file
 
             # Calculate text clip size based on video width
             text_width = int((video_height * 9 / 16) * 0.7)  # 90% of video width after cropped to 9/16
             text_height = int(text_width * 0.35)  # 30% of cropped video width
 
             # Create a text clip for the Reddit question
-            hook_text_clip = TextClip(
+            hook_text_clip = text_renderer.text_clip(
                 hook,
                 fontsize=int(video_height * 0.03),  # 2.5% of video height for font size
                 color='black',
                 bg_color='white',
                 size=(text_width, text_height),  # Allow height to adjust automatically
-                method='caption',
                 align='center'
             ).set_duration(hook_audio_duration)
 
-            return hook_text_clip, hook_audio_path
+            return hook_text_clip, hook_speech
         except Exception as e:
             logging.error(f"Error creating hook clip: {e}")
             return None, None
@@ -77,7 +62,7 @@ class ReadyMadeScriptGenerator:
         """Generate a hook for the video script."""
         try:
 
-            response = openai.chat.completions.create(
+            response = await gateway.chat(
                 model="gpt-3.5-turbo-0125",
                 temperature=0.25,
                 max_tokens=250,
@@ -113,6 +98,7 @@ class ReadyMadeScriptGenerator:
             dict: A dictionary with the status of the video generation and a message.
         """
         clips_to_close = []
+        background_tasks = []
         try:
             if not video_path_or_url:
                 logging.error("video_path_or_url cannot be empty.")
@@ -152,32 +138,44 @@ class ReadyMadeScriptGenerator:
                 logging.error(f"Prompt template file {prompt_template_path} not found.")
                 raise FileNotFoundError(f"Prompt template file {prompt_template_path} not found.")
             # Generate the script or use the provided script
-            hook = video_hook if video_hook else await self.generate_hook(video_script)
             youtube_short_story = video_script
             if not youtube_short_story:
                 logging.error("Failed to generate script.")
                 return {"status": "error", "message": "Failed to generate script."}
 
+            # The narration is synthesized concurrently while the hook, its clip and the background are prepared
+            story_voice_task = asyncio.create_task(
+                self.video_editor.generate_narration(youtube_short_story)
+            )
+            background_tasks.append(story_voice_task)
+            # Only needed to pick images; also runs while the clips are prepared
+            summary_task = asyncio.create_task(self.gpt_summary_of_script(youtube_short_story)) if add_images else None
+            if summary_task:
+                background_tasks.append(summary_task)
+            hook = video_hook if video_hook else await self.generate_hook(video_script)
+
             """ Define video length for each clip (question and story) """
             # Initialize Reddit clips
             # Create the Reddit question clip with the actual video width
-            hook_text_clip, hook_audio_path = await self.create_hook_text_clip(hook, video_height)
-            hook_audio_clip = AudioFileClip(hook_audio_path)
-            hook_audio_duration = hook_audio_clip.duration
-            clips_to_close.append(hook_audio_clip)
+            hook_text_clip, hook_speech = await self.create_hook_text_clip(hook, video_height)
+            if hook_speech is None:
+                return {"status": "error", "message": "Failed to create the hook clip."}
+            hook_audio_clip = hook_speech.to_clip()
+            hook_audio_duration = hook_speech.duration
             # Initialize Background video
-            background_video_clip = VideoFileClip(video_path)
+            background_video_clip = self.video_editor.open_background_9_16(video_path)  # cropped and capped to 30 fps while decoding
             clips_to_close.append(background_video_clip)
             background_video_length = background_video_clip.duration
             ## Initialize Story Audio
-            story_audio_path = await self.video_editor.generate_voice(youtube_short_story)
-            if not story_audio_path:
+            story_speech = await story_voice_task
+            if not story_speech:
                 logging.error("Failed to generate audio.")
                 return {"status": "error", "message": "Failed to generate audio."}
 
-            story_audio_clip = AudioFileClip(story_audio_path)
-            clips_to_close.append(story_audio_clip)
-            story_audio_length = story_audio_clip.duration
+            story_audio_clip = story_speech.to_clip()
+            story_audio_length = story_speech.duration
+            # Transcription still needs a file
+            story_audio_path = self.video_editor.save_voice(story_speech)
         
             # Calculate video times to cut clips
             max_start_time: float = background_video_length - story_audio_length - hook_audio_duration
@@ -185,9 +183,8 @@ class ReadyMadeScriptGenerator:
             end_time: float = start_time + hook_audio_duration + story_audio_length
             
             """ Cut video once """
-            cut_video_path: str = self.video_editor.cut_video(video_path, start_time, end_time)
-            cut_video_clip = VideoFileClip(cut_video_path)
-            clips_to_close.append(cut_video_clip)
+            # Virtual subclip: the background is only decoded once, by the final render
+            cut_video_clip = background_video_clip.subclip(start_time, end_time)
 
             """ Handle hook video """
             hook_video = cut_video_clip.subclip(0, hook_audio_duration)
@@ -216,7 +213,7 @@ class ReadyMadeScriptGenerator:
                 captions_settings.get('font', 'LEMONMILK-Bold.otf')
             )
 
-            video_context = self.gpt_summary_of_script(youtube_short_story)
+            video_context = await summary_task if add_images else ''
             story_image_paths = self.image_handler.get_images_from_subtitles(story_subtitles_path, video_context, story_audio_length) if add_images else []
             story_video = self.video_editor.add_images_to_video(story_video, story_image_paths)
             
@@ -230,7 +227,7 @@ class ReadyMadeScriptGenerator:
             final_video_output_path = self.video_editor.render_final_video(combined_clips)
             
             # Cleanup: Ensure temporary files are removed
-            self.video_editor.cleanup_files([story_audio_path, cut_video_path, story_subtitles_path, hook_audio_path], story_image_paths)
+            self.video_editor.cleanup_files([story_audio_path, story_subtitles_path], story_image_paths)
             
             logging.info(f"FINAL OUTPUT PATH: {final_video_output_path}")
             return {"status": "success", "message": "Video generated successfully.", "output_path": final_video_output_path}
@@ -239,6 +236,10 @@ class ReadyMadeScriptGenerator:
             logging.error(f"Error in video generation: {e}")
             return {"status": "error", "message": f"Error in video generation: {str(e)}"}
         finally:
+            # Requests still running here were abandoned by an error, don't leave them pending
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
             # Close all clips
             for clip in clips_to_close:
                 clip.close()
@@ -1,8 +1,8 @@
 import yaml
+import asyncio
 import logging
-from moviepy.editor import VideoFileClip, AudioFileClip, CompositeVideoClip, TextClip, CompositeAudioClip, ColorClip
+from moviepy.editor import VideoFileClip, CompositeVideoClip, ImageClip, CompositeAudioClip, ColorClip
 import random
-from openai import OpenAI
 import os
 import re
 
@@ -12,6 +12,8 @@ logging.basicConfig(level=logging.INFO)
 from .image_handler import ImageHandler
 from .video_editor import VideoEditor
 from .captions.caption_handler import CaptionHandler
+from .captions.text_renderer import text_renderer
+from .tts.speech import Speech
 
 def load_prompt(file_path):
     """Load the YAML prompt template file."""
@@ -33,56 +35,38 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 openai_api_key = os.getenv('OPENAI_API_KEY')
 pexels_api_key = os.getenv('PEXELS_API_KEY')
 
-openai = OpenAI(api_key=openai_api_key)
-
 class RedditStoryGenerator:
     def __init__(self):
         self.video_editor: VideoEditor = VideoEditor()
         self.image_handler: ImageHandler = ImageHandler(pexels_api_key, openai_api_key)
         self.caption_handler: CaptionHandler = CaptionHandler()
 
-    def gpt_summary_of_script(self, video_script: str) -> str:
-        try:
-            completion = openai.chat.completions.create(
-                model="gpt-3.5-turbo-0125",
-                temperature=0.25,
-                max_tokens=250,
-                messages=[
-                    {"role": "user", "content": f"Summarize the following video script; it is very important that you keep it to one line. \n Script: {video_script}"}
-                ]
-            )
-            logging.info("Script generated successfully.")
-            return completion.choices[0].message.content
-        except Exception as e:
-            logging.error(f"Error generating script summary: {e}")
-            return ""  # Return an empty string on error
+    async def gpt_summary_of_script(self, video_script: str) -> str:
+        # Same prompt as VideoEditor's, so both share cached answers
+        return await self.video_editor.gpt_summary_of_script(video_script)
 
-    async def create_reddit_question_clip(self, reddit_question: str, video_height: int = 720) -> tuple[TextClip, str]:
+    async def create_reddit_question_clip(self, reddit_question: str, video_height: int = 720) -> tuple[ImageClip, Speech]:
         """Create a text clip for the Reddit question and generate its audio."""
         try:
             # Generate audio for the Reddit question
-            reddit_question_audio_path: str = await self.video_editor.generate_voice(reddit_question)
-
-            reddit_question_audio_clip: AudioFileClip = AudioFileClip(reddit_question_audio_path)
-            reddit_question_audio_duration: float = reddit_question_audio_clip.duration
-            reddit_question_audio_clip.close()
+            reddit_question_speech: Speech = await self.video_editor.generate_voice(reddit_question)
+            reddit_question_audio_duration: float = reddit_question_speech.duration  # known without reading any file
 
             # Calculate text clip size based on video width
             text_width = int((video_height * 9 / 16) * 0.7)  # 90% of video width after cropped to 9/16
             text_height = int(text_width * 0.35)  # 30% of cropped video width
 
             # Create a text clip for the Reddit question
-            reddit_question_text_clip = TextClip(
+            reddit_question_text_clip = text_renderer.text_clip(
                 reddit_question,
                 fontsize=int(video_height * 0.03),  # 2.5% of video height for font size
                 color='black',
                 bg_color='white',
                 size=(text_width, text_height),  # Allow height to adjust automatically
-                method='caption',
                 align='center'
             ).set_duration(reddit_question_audio_duration)
 
-            return reddit_question_text_clip, reddit_question_audio_path
+            return reddit_question_text_clip, reddit_question_speech
         except Exception as e:
             logging.error(f"Error creating Reddit question clip: {e}")
             return None, None
@@ -107,6 +91,7 @@ class RedditStoryGenerator:
             dict: A dictionary with the status of the video generation and a message.
         """
         clips_to_close = []
+        background_tasks = []
         try:
             if not video_path_or_url:
                 raise ValueError("video_path_or_url cannot be empty.")
@@ -142,26 +127,34 @@ class RedditStoryGenerator:
                 logging.error("Failed to generate script.")
                 return {"status": "error", "message": "Failed to generate script."}
 
+            # The narration is synthesized concurrently while the question clip and background are prepared
+            story_voice_task = asyncio.create_task(
+                self.video_editor.generate_narration(youtube_short_story)
+            )
+            background_tasks.append(story_voice_task)
+
             """ Define video length for each clip (question and story) """
             # Initialize Reddit clips
                         # Create the Reddit question clip with the actual video width
-            reddit_question_text_clip, reddit_question_audio_path = await self.create_reddit_question_clip(reddit_question, video_height)
-            reddit_question_audio_clip: AudioFileClip = AudioFileClip(reddit_question_audio_path)
-            reddit_question_audio_duration: float = reddit_question_audio_clip.duration
-            clips_to_close.append(reddit_question_audio_clip)
+            reddit_question_text_clip, reddit_question_speech = await self.create_reddit_question_clip(reddit_question, video_height)
+            if reddit_question_speech is None:
+                return {"status": "error", "message": "Failed to create the Reddit question clip."}
+            reddit_question_audio_clip = reddit_question_speech.to_clip()
+            reddit_question_audio_duration: float = reddit_question_speech.duration
             # Initialize Background video
-            background_video_clip: VideoFileClip = VideoFileClip(video_path)
+            background_video_clip: VideoFileClip = self.video_editor.open_background_9_16(video_path)  # cropped and capped to 30 fps while decoding
             clips_to_close.append(background_video_clip)
             background_video_length: float = background_video_clip.duration
             ## Initialize Story Audio
-            story_audio_path: str = await self.video_editor.generate_voice(youtube_short_story)
-            if not story_audio_path:
+            story_speech: Speech = await story_voice_task
+            if not story_speech:
                 logging.error("Failed to generate audio.")
                 return {"status": "error", "message": "Failed to generate audio."}
 
-            story_audio_clip: AudioFileClip = AudioFileClip(story_audio_path)
-            clips_to_close.append(story_audio_clip)
-            story_audio_length: float = story_audio_clip.duration
+            story_audio_clip = story_speech.to_clip()
+            story_audio_length: float = story_speech.duration
+            # Transcription still needs a file
+            story_audio_path: str = self.video_editor.save_voice(story_speech)
         
             # Calculate video times to cut clips
             max_start_time: float = background_video_length - story_audio_length - reddit_question_audio_duration
@@ -169,9 +162,8 @@ class RedditStoryGenerator:
             end_time: float = start_time + reddit_question_audio_duration + story_audio_length
             
             """ Cut video once """
-            cut_video_path: str = self.video_editor.cut_video(video_path, start_time, end_time)
-            cut_video_clip = VideoFileClip(cut_video_path)
-            clips_to_close.append(cut_video_clip)
+            # Virtual subclip: the background is only decoded once, by the final render
+            cut_video_clip = background_video_clip.subclip(start_time, end_time)
 
             """ Handle reddit question video """
             reddit_question_video = cut_video_clip.subclip(0, reddit_question_audio_duration)
@@ -214,7 +206,7 @@ class RedditStoryGenerator:
             final_video_output_path = self.video_editor.render_final_video(combined_clips)
             
             # Cleanup: Ensure temporary files are removed
-            self.video_editor.cleanup_files([story_audio_path, cut_video_path, story_subtitles_path, reddit_question_audio_path], story_image_paths)
+            self.video_editor.cleanup_files([story_audio_path, story_subtitles_path], story_image_paths)
             
             logging.info(f"FINAL OUTPUT PATH: {final_video_output_path}")
             return {"status": "success", "message": "Video generated successfully.", "output_path": final_video_output_path}
@@ -223,6 +215,10 @@ class RedditStoryGenerator:
             logging.error(f"Error in video generation: {e}")
             return {"status": "error", "message": f"Error in video generation: {str(e)}"}
         finally:
+            # Requests still running here were abandoned by an error, don't leave them pending
+            for task in background_tasks:
+                task.cancel()
+            await asyncio.gather(*background_tasks, return_exceptions=True)
             # Close all clips
             for clip in clips_to_close:
                 clip.close()
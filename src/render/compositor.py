@@ -0,0 +1,200 @@
+import math
+import heapq
+import logging
+
+import numpy as np
+from moviepy.editor import CompositeVideoClip
+
+from .blend import prepare_layer, blit_layer
+
+
+class IntervalIndex:
+    """Bucketed interval index over [start, end) intervals.
+
+    Each interval is registered in the fixed-size time buckets it overlaps, so finding the
+    intervals active at t only looks at the handful sharing t's bucket instead of all of them.
+    Results come back in registration order.
+    """
+
+    def __init__(self, intervals: list, bucket_seconds: float = 1.0):
+        self.intervals = intervals
+        self.bucket_seconds = bucket_seconds
+        self.buckets = {}
+        self.unbounded = []  # intervals without an end are checked on every query
+
+        for index, (start, end) in enumerate(intervals):
+            if end is None or math.isinf(end):
+                self.unbounded.append(index)
+                continue
+            first_bucket = int(start // bucket_seconds)
+            last_bucket = max(first_bucket, int(math.ceil(end / bucket_seconds)) - 1)
+            for bucket in range(first_bucket, last_bucket + 1):
+                self.buckets.setdefault(bucket, []).append(index)
+
+    def active(self, t: float) -> list:
+        candidates = self.buckets.get(int(t // self.bucket_seconds), [])
+        if self.unbounded:
+            candidates = heapq.merge(self.unbounded, candidates)
+        active = []
+        for index in candidates:
+            start, end = self.intervals[index]
+            if start <= t and (end is None or t < end):
+                active.append(index)
+        return active
+
+
+def mark_static(clip):
+    """Flag a clip whose frame never changes over its lifetime (still image, text, solid colour)."""
+    clip.static_frame = True
+    return clip
+
+
+def clip_frame_key(clip, t):
+    """Hashable key of what the clip shows at t, or None if it may change from frame to frame.
+
+    Static clips always return the same key, clips exposing a frame_key(t) method (caption
+    track, nested indexed composites) return their own, everything else is dynamic.
+    """
+    if getattr(clip, 'static_frame', False):
+        return True
+    key_at = getattr(clip, 'frame_key', None)
+    return key_at(t - clip.start) if key_at is not None else None
+
+
+def layer_position(clip, t, frame_shape, layer_shape) -> tuple:
+    """Integer top-left corner of the clip on the frame, resolved like moviepy's blit_on."""
+    frame_height, frame_width = frame_shape[:2]
+    height, width = layer_shape[:2]
+    pos = clip.pos(t)
+    if isinstance(pos, str):
+        pos = {'center': ['center', 'center'], 'left': ['left', 'center'], 'right': ['right', 'center'],
+               'top': ['center', 'top'], 'bottom': ['center', 'bottom']}[pos]
+    else:
+        pos = list(pos)
+
+    if clip.relative_pos:
+        for i, dim in enumerate([frame_width, frame_height]):
+            if not isinstance(pos[i], str):
+                pos[i] = dim * pos[i]
+
+    if isinstance(pos[0], str):
+        pos[0] = {'left': 0, 'center': (frame_width - width) / 2, 'right': frame_width - width}[pos[0]]
+    if isinstance(pos[1], str):
+        pos[1] = {'top': 0, 'center': (frame_height - height) / 2, 'bottom': frame_height - height}[pos[1]]
+    return int(pos[0]), int(pos[1])
+
+
+class IndexedCompositeVideoClip(CompositeVideoClip):
+    """CompositeVideoClip whose per-frame cost scales with the layers active at t.
+
+    The stock compositor checks every clip on every frame; with one clip per caption that
+    grows with the transcript. Here clips are ordered by z_index once and kept in an
+    IntervalIndex, and only the clips playing at t are blitted.
+
+    When the clips playing at t are all static (see clip_frame_key) and are the same as for the
+    previous frame, the previous composed frame is returned without compositing again. On
+    still-image videos that skips everything but the frames where a caption or scene changes.
+
+    Colour frames are composed by the fixed-point kernel in render.blend on one reused
+    uint8 canvas: opaque layers are slice copies, constant opacity and masks are blended
+    in uint16 with premultiplied alpha. Static layers are prepared once. Mask composites
+    keep moviepy's float path.
+
+    Args:
+        clips (list): Clips to composite.
+        z_indices (list, optional): Stacking order per clip (higher is on top). Clips with the
+            same z keep their list order. Defaults to plain list order.
+    """
+
+    def __init__(self, clips, size=None, bg_color=None, use_bgclip=False, ismask=False, z_indices=None, bucket_seconds=1.0):
+        if z_indices is not None:
+            order = sorted(range(len(clips)), key=lambda i: z_indices[i])
+            if use_bgclip:
+                # The background clip always stays first
+                order = [0] + [i for i in order if i != 0]
+            clips = [clips[i] for i in order]
+
+        CompositeVideoClip.__init__(self, clips, size=size, bg_color=bg_color, use_bgclip=use_bgclip, ismask=ismask)
+
+        self.interval_index = IntervalIndex([(clip.start, clip.end) for clip in self.clips], bucket_seconds)
+        logging.debug(f"Indexed {len(self.clips)} clips into {len(self.interval_index.buckets)} buckets")
+
+        # moviepy's float compositor, still used for masks
+        self._float_compose = self.make_frame
+        compose = self._float_compose if ismask else self.compose
+        self._last_frame = (None, None)
+        self._canvas = None
+        self._prepared = {}
+
+        def make_frame(t):
+            key = self.frame_key(t)
+            if key is not None and key == self._last_frame[0]:
+                return self._last_frame[1]
+            frame = compose(t)
+            self._last_frame = (key, frame)
+            return frame
+
+        self.make_frame = make_frame
+
+    def playing_clips(self, t=0):
+        """Clips playing at time `t`, bottom to top."""
+        return [self.clips[index] for index in self.interval_index.active(t)]
+
+    def compose(self, t):
+        """Compose the frame at t on the reused canvas (fixed point)."""
+        background = self.bg.get_frame(t)
+        if np.ndim(background) != 3 or background.shape[2] != 3:
+            return self._float_compose(t)
+        if self._canvas is None or self._canvas.shape != background.shape:
+            self._canvas = np.empty(background.shape, dtype=np.uint8)
+        canvas = self._canvas
+        np.copyto(canvas, background, casting='unsafe')
+
+        active = self.interval_index.active(t)
+        if len(self._prepared) > len(active):
+            # Forget the layers that stopped playing
+            self._prepared = {index: self._prepared[index] for index in active if index in self._prepared}
+
+        for index in active:
+            clip = self.clips[index]
+            layer = self.prepared_layer(index, clip, t)
+            if layer is not None:
+                x, y = layer_position(clip, t - clip.start, canvas.shape, layer.shape)
+                blit_layer(layer, canvas, x, y)
+
+        # The canvas is overwritten by the next frame; callers get their own copy
+        return canvas.copy()
+
+    def prepared_layer(self, index, clip, t):
+        """PreparedLayer of a clip at t, reused while a static clip (or a caption track's cue) is unchanged."""
+        key = clip_frame_key(clip, t)
+        cached = self._prepared.get(index)
+        if key is not None and cached is not None and cached[0] == key:
+            return cached[1]
+
+        clip_time = t - clip.start
+        frame = clip.get_frame(clip_time)
+        mask = clip.mask.get_frame(clip_time) if clip.mask is not None else None
+        if mask is not None and frame.shape[:2] != mask.shape[:2]:
+            frame = clip.fill_array(frame, mask.shape)
+        layer = prepare_layer(frame, mask)
+
+        if key is not None:
+            self._prepared[index] = (key, layer)
+        return layer
+
+    def frame_key(self, t):
+        """Key of the composed frame at t, or None when a dynamic clip is playing."""
+        keys = []
+        if not self.created_bg:
+            # use_bgclip: the first clip is the background
+            background_key = clip_frame_key(self.bg, t)
+            if background_key is None:
+                return None
+            keys.append((-1, background_key))
+        for index in self.interval_index.active(t):
+            key = clip_frame_key(self.clips[index], t)
+            if key is None:
+                return None
+            keys.append((index, key))
+        return tuple(keys)
@@ -0,0 +1,68 @@
+import os
+import logging
+from functools import lru_cache
+
+import numpy as np
+from PIL import Image
+from moviepy.editor import ImageClip
+
+
+def target_size(source_size: tuple, width=None, height=None) -> tuple:
+    """Final pixel size for a source image, keeping the aspect ratio when one side is None.
+
+    Sizes are truncated to whole pixels, like moviepy's resize.
+    """
+    source_width, source_height = source_size
+    if width is None and height is None:
+        return source_width, source_height
+    if width is None:
+        width = source_width * height / source_height
+    elif height is None:
+        height = source_height * width / source_width
+    return max(int(width), 1), max(int(height), 1)
+
+
+@lru_cache(maxsize=32)
+def _load_sprite(image_path: str, mtime: float, width, height, rotation: float, opacity: float) -> np.ndarray:
+    with Image.open(image_path) as img:
+        size = target_size(img.size, width, height)
+        # JPEG decodes straight to a 1/2, 1/4 or 1/8 scale no smaller than the target
+        img.draft('RGB', size)
+        img = img.convert('RGBA')
+        if img.size != size:
+            img = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+
+    if rotation:
+        # Counter-clockwise with the canvas expanded, as moviepy's rotate
+        img = img.rotate(rotation, resample=Image.BICUBIC, expand=True)
+
+    sprite = np.array(img)
+    if opacity < 1.0:
+        sprite[:, :, 3] = (sprite[:, :, 3] * opacity).astype(np.uint8)
+    sprite.setflags(write=False)
+    return sprite
+
+
+def load_sprite(image_path: str, width=None, height=None, rotation: float = 0, opacity: float = 1.0) -> np.ndarray:
+    """Decode an image once at its final size, rotation and opacity into an HxWx4 uint8 array.
+
+    Large photos (stock originals can be 6000px wide) are never decoded at full size
+    when a smaller target is asked for, and nothing is left for moviepy to redo per frame.
+
+    Args:
+        width, height: Target size in pixels; with only one given the aspect ratio is kept.
+        rotation (float): Degrees counter-clockwise.
+        opacity (float): Multiplied into the alpha channel.
+    """
+    return _load_sprite(image_path, os.path.getmtime(image_path), width, height, float(rotation or 0), float(opacity))
+
+
+def sprite_clip(image_path: str, width=None, height=None, rotation: float = 0, opacity: float = 1.0) -> ImageClip:
+    """ImageClip of a sprite from load_sprite, with a mask only when it has transparency."""
+    sprite = load_sprite(image_path, width, height, rotation, opacity)
+    alpha = sprite[:, :, 3]
+    clip = ImageClip(sprite[:, :, :3])
+    if alpha.min() < 255:
+        clip.mask = ImageClip(alpha.astype(np.float32) / 255, ismask=True)
+    logging.debug(f"Sprite {image_path} ingested at {clip.w}x{clip.h}")
+    return clip
@@ -0,0 +1,127 @@
+import os
+import queue
+import shutil
+import logging
+import tempfile
+import threading
+import subprocess
+
+import numpy as np
+from moviepy.config import get_setting
+from moviepy.tools import find_extension
+from moviepy.video.io.ffmpeg_writer import FFMPEG_VideoWriter
+
+# Frames composed ahead of the encoder
+DEFAULT_QUEUE_SIZE = 8
+
+_DONE = object()
+
+
+class _ProducerError:
+    def __init__(self, error):
+        self.error = error
+
+
+def _put(frames: queue.Queue, item, stop: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer has stopped."""
+    while not stop.is_set():
+        try:
+            frames.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce_frames(clip, fps: float, frames: queue.Queue, stop: threading.Event):
+    """Compose every frame of the clip into the queue (runs on its own thread)."""
+    try:
+        for t in np.arange(0, clip.duration, 1.0 / fps):
+            frame = clip.get_frame(t)
+            if frame.dtype != np.uint8:
+                frame = frame.astype(np.uint8)
+            if not _put(frames, frame, stop):
+                return
+        _put(frames, _DONE, stop)
+    except Exception as e:
+        _put(frames, _ProducerError(e), stop)
+
+
+def write_video(clip, output_path: str, fps: float = None, codec: str = 'libx264', preset: str = 'medium',
+                ffmpeg_params: list = None, audio_codec: str = 'aac', audio_bitrate: str = None,
+                audio_fps: int = 44100, threads: int = None, audio: bool = True,
+                queue_size: int = DEFAULT_QUEUE_SIZE) -> str:
+    """Pipelined replacement for clip.write_videofile.
+
+    One thread composes frames into a bounded queue while the calling thread streams them to
+    the ffmpeg encoder, and the soundtrack is encoded on a third thread at the same time. The
+    audio is muxed in afterwards with a stream copy. Wall time approaches the slowest stage
+    instead of the sum of all of them; frame times and encoder settings match write_videofile.
+
+    Frames are handed over by reference: composed frames are never modified once returned
+    (the compositor returns a fresh frame each time), so no copy into a buffer pool is needed.
+
+    Args:
+        audio (bool): False writes the video stream only, like write_videofile(audio=False).
+    """
+    fps = fps or clip.fps
+    temp_dir = tempfile.mkdtemp(prefix='render_', dir=os.path.dirname(os.path.abspath(output_path)))
+    video_path = os.path.join(temp_dir, 'video' + os.path.splitext(output_path)[1])
+
+    audio_path, audio_thread, audio_errors = None, None, []
+    if audio and clip.audio is not None:
+        audio_path = os.path.join(temp_dir, 'audio.' + find_extension(audio_codec))
+
+        def encode_audio():
+            try:
+                clip.audio.write_audiofile(audio_path, audio_fps, 4, 2000, audio_codec, bitrate=audio_bitrate, logger=None)
+            except Exception as e:
+                audio_errors.append(e)
+
+        audio_thread = threading.Thread(target=encode_audio, name='audio-encode', daemon=True)
+        audio_thread.start()
+
+    frames = queue.Queue(maxsize=queue_size)
+    stop = threading.Event()
+    producer = threading.Thread(target=_produce_frames, args=(clip, fps, frames, stop), name='compose', daemon=True)
+    producer.start()
+
+    try:
+        writer = FFMPEG_VideoWriter(video_path, clip.size, fps, codec=codec, preset=preset,
+                                    threads=threads, ffmpeg_params=ffmpeg_params)
+        try:
+            count = 0
+            while True:
+                frame = frames.get()
+                if frame is _DONE:
+                    break
+                if isinstance(frame, _ProducerError):
+                    raise frame.error
+                writer.write_frame(frame)
+                count += 1
+        finally:
+            writer.close()
+        logging.info(f"Encoded {count} frames to {video_path}")
+
+        if audio_thread is not None:
+            audio_thread.join()
+            if audio_errors:
+                raise audio_errors[0]
+
+        if not audio_path:
+            shutil.move(video_path, output_path)
+            return output_path
+
+        cmd = [get_setting("FFMPEG_BINARY"), '-y', '-loglevel', 'error', '-i', video_path, '-i', audio_path,
+               '-map', '0:v', '-map', '1:a', '-c', 'copy', output_path]
+        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        return output_path
+    except subprocess.CalledProcessError as e:
+        logging.error(f"Error muxing {output_path}: {e.stderr.decode(errors='ignore')}")
+        raise
+    finally:
+        stop.set()
+        producer.join()
+        if audio_thread is not None:
+            audio_thread.join()
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,26 @@
+import logging
+
+
+def even_size(size: tuple) -> tuple:
+    """Largest even (width, height) not above size; yuv420p needs both even."""
+    return tuple(int(value) - int(value) % 2 for value in size)
+
+
+def set_opacity(clip, opacity: float):
+    """clip.set_opacity, skipped at full opacity (it would add a mask multiply to every frame)."""
+    if opacity is None or opacity >= 1.0:
+        return clip
+    return clip.set_opacity(opacity)
+
+
+def fit_even(clip):
+    """Make the clip's size even for the encoder without resampling.
+
+    An already even clip is returned as is. Otherwise the last row and/or column is
+    cropped off, a slice per frame instead of a full-frame resize.
+    """
+    size = even_size(clip.size)
+    if size == tuple(clip.size):
+        return clip
+    logging.info(f"Trimming {clip.size} to even size {size}")
+    return clip.crop(x1=0, y1=0, width=size[0], height=size[1])
@@ -0,0 +1,152 @@
+import os
+import re
+import logging
+import subprocess as sp
+
+from moviepy.config import get_setting
+from moviepy.editor import VideoClip, VideoFileClip, AudioFileClip
+from moviepy.video.io.ffmpeg_reader import FFMPEG_VideoReader, ffmpeg_parse_infos
+
+from .transforms import even_size
+
+
+_DISPLAYMATRIX = re.compile(r'displaymatrix: rotation of (-?[\d.]+) degrees')
+
+
+def video_infos(filename) -> dict:
+    """ffmpeg_parse_infos, with video_rotation also read from the display matrix.
+
+    moviepy only knows the legacy 'rotate' tag; recent ffmpeg versions report the rotation
+    of phone videos as side data instead.
+    """
+    infos = ffmpeg_parse_infos(filename)
+    if not infos.get('video_rotation'):
+        proc = sp.run([get_setting("FFMPEG_BINARY"), '-hide_banner', '-i', filename],
+                      stdout=sp.DEVNULL, stderr=sp.PIPE, stdin=sp.DEVNULL)
+        match = _DISPLAYMATRIX.search(proc.stderr.decode('utf8', errors='ignore'))
+        if match:
+            infos['video_rotation'] = int(round(float(match.group(1)))) % 360
+    return infos
+
+
+def displayed_size(infos: dict) -> tuple:
+    """(width, height) of the frames ffmpeg decodes: it auto-rotates, so 90/270 swap the stored size."""
+    width, height = infos['video_size']
+    if infos.get('video_rotation', 0) % 360 in (90, 270):
+        return height, width
+    return width, height
+
+
+def center_crop(source_size: tuple, aspect_ratio: float, even: bool = False):
+    """(x, y, width, height) of the full-height centered crop with the given width/height ratio.
+
+    A source already narrower than the ratio keeps its width. With even=True the crop is
+    rounded down to even dimensions. None when nothing needs cropping.
+    """
+    source_width, source_height = source_size
+    width, height = min(int(source_height * aspect_ratio), source_width), source_height
+    if even:
+        width, height = even_size((width, height))
+    if (width, height) == tuple(source_size):
+        return None
+    return ((source_width - width) // 2, 0, width, height)
+
+
+class FilteredVideoReader(FFMPEG_VideoReader):
+    """FFMPEG_VideoReader that lets ffmpeg drop frames, crop and scale before anything is piped.
+
+    Frames arrive at the final size and frame rate, so Python never touches the pixels
+    (or frames) that would be thrown away.
+
+    Args:
+        crop (tuple): (x, y, width, height) in source pixels, after ffmpeg's auto-rotation.
+        size (tuple): (width, height) after the crop.
+        fps (float): Output frame rate; never above the source rate.
+    """
+
+    def __init__(self, filename, crop=None, size=None, fps=None, pix_fmt="rgb24", resize_algo='bicubic'):
+        self.filename = filename
+        self.proc = None
+        infos = video_infos(filename)
+        self.infos = infos
+        self.rotation = infos['video_rotation']
+        self.duration = infos['video_duration']
+        self.ffmpeg_duration = infos['duration']
+
+        source_fps = infos['video_fps']
+        self.fps = min(fps, source_fps) if fps else source_fps
+        self.nframes = int(self.duration * self.fps)
+
+        self.crop = tuple(int(value) for value in crop) if crop else None
+        self.size = tuple(int(value) for value in size) if size else (self.crop[2:] if self.crop else displayed_size(infos))
+        self.resize_algo = resize_algo
+
+        self.pix_fmt = pix_fmt
+        self.depth = 4 if pix_fmt == 'rgba' else 3
+        w, h = self.size
+        self.bufsize = self.depth * w * h + 100
+
+        self.initialize()
+        self.pos = 1
+        self.lastread = self.read_frame()
+
+    def filters(self) -> str:
+        # Frames are dropped first so the crop and scale only run on frames that are kept
+        filters = []
+        if self.fps != self.infos['video_fps']:
+            filters.append('fps=%r' % self.fps)
+        if self.crop:
+            x, y, w, h = self.crop
+            filters.append('crop=%d:%d:%d:%d' % (w, h, x, y))
+        filters.append('scale=%d:%d' % tuple(self.size))
+        return ','.join(filters)
+
+    def initialize(self, starttime=0):
+        """Opens the file, creates the pipe. """
+        self.close()  # if any
+
+        if starttime != 0:
+            offset = min(1, starttime)
+            i_arg = ['-ss', "%.06f" % (starttime - offset),
+                     '-i', self.filename,
+                     '-ss', "%.06f" % offset]
+        else:
+            i_arg = ['-i', self.filename]
+
+        cmd = ([get_setting("FFMPEG_BINARY")] + i_arg +
+               ['-loglevel', 'error',
+                '-f', 'image2pipe',
+                '-vf', self.filters(),
+                '-sws_flags', self.resize_algo,
+                "-pix_fmt", self.pix_fmt,
+                '-vcodec', 'rawvideo', '-'])
+        popen_params = {"bufsize": self.bufsize,
+                        "stdout": sp.PIPE,
+                        "stderr": sp.PIPE,
+                        "stdin": sp.DEVNULL}
+
+        if os.name == "nt":
+            popen_params["creationflags"] = 0x08000000
+
+        self.proc = sp.Popen(cmd, **popen_params)
+
+
+class DecodedVideoClip(VideoFileClip):
+    """VideoFileClip reading through a FilteredVideoReader (crop, scale and fps done by ffmpeg)."""
+
+    def __init__(self, filename, crop=None, size=None, fps=None, audio=True, audio_fps=44100, audio_nbytes=2):
+        VideoClip.__init__(self)
+        self.reader = FilteredVideoReader(filename, crop=crop, size=size, fps=fps)
+
+        self.duration = self.reader.duration
+        self.end = self.reader.duration
+        self.fps = self.reader.fps
+        self.size = self.reader.size
+        self.rotation = self.reader.rotation
+        self.filename = self.reader.filename
+        self.make_frame = lambda t: self.reader.get_frame(t)
+
+        if audio and self.reader.infos['audio_found']:
+            self.audio = AudioFileClip(filename, fps=audio_fps, nbytes=audio_nbytes)
+
+        logging.debug(f"Decoding {filename} with filters {self.reader.filters()}")
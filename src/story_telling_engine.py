@@ -1,10 +1,12 @@
 import json
 import yaml
+import asyncio
 import os
 import uuid
 import logging
 
 from .json_2_video_engine.json_2_video import PyJson2Video
+from .json_2_video_engine.utils.asset_prefetch import AssetPrefetcher, PrefetchedAssets
 from .video_editor import VideoEditor
 
 logging.basicConfig(level=logging.INFO)
@@ -21,7 +23,12 @@ class StoryTellingEngine:
         with open(prompt_template_generate_script, 'r') as file:
             self.prompt_template_generate_script = yaml.safe_load(file)
 
-    async def generate_video(self, is_instructions:bool, script:str = None, instructions:str = None):
+    async def generate_video(self, is_instructions:bool, script:str = None, instructions:str = None, stream:bool = True):
+        """Storytelling video for script (or a script generated from instructions).
+
+        With stream, every scene's voice and image are produced as soon as the scene is written,
+        while the storyboard is still streaming in.
+        """
         if script and len(script) > 1300:
             logging.error("The video script should not be longer than 1300 characters.")
             return {"status": "error", "message": "The video script should not be longer than 1300 characters."}
@@ -30,8 +37,12 @@ class StoryTellingEngine:
             script = await self.video_editor.generate_script(instructions, self.prompt_template_generate_script)
             script = script["text_script"]
 
-        scenes = await self.video_editor.create_scenes_from_script(script)
-        script_summary = await self.video_editor.gpt_summary_of_script(script)
+        if stream:
+            scenes, image_prompts, assets = await self.produce_scenes(script)
+        else:
+            # Scenes, summary and image prompts in one round trip
+            scenes, script_summary, image_prompts = await self.video_editor.create_storyboard(script)
+            assets = None
 
         json_data = {
             "images": [],
@@ -47,11 +58,11 @@ class StoryTellingEngine:
             }
         }
 
-        for index, scene in enumerate(scenes):
+        for index, (scene, image_prompt) in enumerate(zip(scenes, image_prompts)):
             scene_bg_image = {
                 "image_id": f"image_{index}",
                 "source_type": "prompt",
-                "source_content": await self.video_editor.gpt_image_prompt_from_scene(scene, script_summary),
+                "source_content": image_prompt,
                 "start_time": f"scr_{index}.start_time",
                 "end_time": f"scr_{index}.end_time",
                 "max_width": "full",
@@ -72,7 +83,58 @@ class StoryTellingEngine:
 
             json_data["script"].append(scene_script)
             
-        json2video = PyJson2Video(json_data, os.path.join(os.path.dirname(__file__), '..', 'result', f'storytelling_video_{uuid.uuid4()}.mp4'))
+        json2video = PyJson2Video(json_data, os.path.join(os.path.dirname(__file__), '..', 'result', f'storytelling_video_{uuid.uuid4()}.mp4'),
+                                  assets=assets)
         output_video_path = await json2video.convert()
 
         return output_video_path
+
+    async def produce_scenes(self, script):
+        """Stream the storyboard and start each scene's voice and image as soon as it arrives.
+
+        The prefetcher's per-provider limits bound the pipeline. Returns (scenes, image_prompts,
+        assets), with the assets keyed by scene index as PyJson2Video expects them; anything
+        that failed here is retried by its prefetch.
+        """
+        prefetcher = AssetPrefetcher()
+        assets = PrefetchedAssets()
+        scenes, tasks = [], []
+        summary_task = None
+
+        async def produce_voice(index, scene):
+            try:
+                assets.voices[index] = await prefetcher.fetch_voice(scene)
+            except Exception as e:
+                logging.error(f"Error generating voice for scene {index}: {e}")
+
+        async def produce_image(index, scene, image_prompt, script_summary):
+            try:
+                if image_prompt is None:
+                    image_prompt = await self.video_editor.gpt_image_prompt_from_scene(scene, script_summary if script_summary is not None else await summary_task)
+                assets.images[index] = await prefetcher.fetch_image({"source_type": "prompt", "source_content": image_prompt})
+            except Exception as e:
+                logging.error(f"Error generating image for scene {index}: {e}")
+            return image_prompt or scene
+
+        try:
+            async for scene, image_prompt, script_summary in self.video_editor.stream_storyboard(script):
+                index = len(scenes)
+                logging.info(f"Scene {index} received, starting its voice and image")
+                scenes.append(scene)
+                if image_prompt is None and script_summary is None and summary_task is None:
+                    summary_task = asyncio.create_task(self.video_editor.gpt_summary_of_script(script))
+                tasks.append(asyncio.create_task(produce_voice(index, scene)))
+                tasks.append(asyncio.create_task(produce_image(index, scene, image_prompt, script_summary)))
+
+            results = await asyncio.gather(*tasks)
+        except BaseException:
+            # The storyboard broke off: stop paying for scenes that will never be rendered
+            pending = tasks + ([summary_task] if summary_task else [])
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            for image_path in assets.images.values():
+                if image_path and os.path.exists(image_path):
+                    os.remove(image_path)
+            raise
+        return scenes, results[1::2], assets
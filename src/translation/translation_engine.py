@@ -1,24 +1,21 @@
 import os
+import asyncio
 import logging
-from openai import OpenAI
-from moviepy.editor import AudioFileClip, VideoFileClip, concatenate_audioclips, CompositeAudioClip
+from moviepy.editor import VideoFileClip
 import pysrt
 from typing import List
 import json
 
 from src.video_editor import VideoEditor
 from src.captions.subtitle_generator import SubtitleGenerator
-from moviepy.audio.fx.all import audio_fadein, audio_fadeout
-from moviepy.video.fx.all import speedx
-
-
-openai_api_key = os.getenv("OPENAI_API_KEY")
+from src.llm.gateway import gateway
+from src.tts.speech import synthesize_speech_async
+from src.render.audio_mix import AudioMix, AUDIO_FPS, stretch
 
 
 class TranslationEngine:
     def __init__(self):
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
-        self.openai_client = OpenAI(api_key=openai_api_key)
         self.video_editor = VideoEditor()
         self.subtitle_generator = SubtitleGenerator()
 
@@ -76,18 +73,17 @@ class TranslationEngine:
             # Read subtitles from the file
             subs = pysrt.open(subtitles_path)
             
-            translated_subs = []
-            for i, sub in enumerate(subs):
+            json_response = '''{
+                    "current_translated_subtitle": ""
+                }'''
+
+            async def translate(i, sub):
                 # Get previous and next subtitle texts
                 prev_text = subs[i-1].text if i > 0 else ""
                 next_text = subs[i+1].text if i < len(subs) - 1 else ""
 
-                json_response = '''{
-                    "current_translated_subtitle": ""
-                }'''
-                
                 # Translate the text with context
-                response = self.openai_client.chat.completions.create(
+                response = await gateway.chat(
                     model="gpt-3.5-turbo",
                     response_format={"type": "json_object"},
                     messages=[
@@ -101,13 +97,15 @@ class TranslationEngine:
                 translated_sub_data = json.loads(response_json)
                 translated_text = translated_sub_data.get("current_translated_subtitle", "")
                 # Create a new SubRipItem with translated text
-                translated_sub = pysrt.SubRipItem(
+                return pysrt.SubRipItem(
                     index=sub.index,
                     start=sub.start,
                     end=sub.end,
                     text=translated_text
                 )
-                translated_subs.append(translated_sub)
+
+            # The context comes from the original subtitles, so every line can be translated at once
+            translated_subs = list(await asyncio.gather(*(translate(i, sub) for i, sub in enumerate(subs))))
             
             return translated_subs
         except Exception as e:
@@ -121,53 +119,26 @@ class TranslationEngine:
             speech_file_dir = os.path.join(self.base_dir, '..', 'assets')
             os.makedirs(speech_file_dir, exist_ok=True)
             
-            audio_clips = []
-            
-            for i, subtitle in enumerate(translated_subtitles):
-                speech_file_path = os.path.join(speech_file_dir, f'generated_speech_{i}.mp3')
-                response = self.openai_client.audio.speech.create(
-                    model="tts-1",
-                    voice="echo",
-                    input=subtitle.text
-                )
-                response.stream_to_file(speech_file_path)
-                
-                # Load the generated audio
-                audio_clip = AudioFileClip(speech_file_path)
-                
-                # Calculate the desired duration based on subtitle timing
-                desired_duration = (subtitle.end.seconds + subtitle.end.milliseconds / 1000) - (subtitle.start.seconds + subtitle.start.milliseconds / 1000)
-                
-                # if audio duration is longer than desired duration, speed up the audio
-                if audio_clip.duration > desired_duration:
-                    speed_factor = audio_clip.duration / desired_duration
-                    audio_clip = CompositeAudioClip([audio_clip]).set_duration(audio_clip.duration)
-                    audio_clip = speedx(audio_clip, factor=speed_factor)
-                # if audio duration is shorter than desired duration, slow down the audio
-                elif audio_clip.duration < desired_duration:
-                    speed_factor = desired_duration / audio_clip.duration
-                    audio_clip = CompositeAudioClip([audio_clip]).set_duration(audio_clip.duration)
-                    audio_clip = speedx(audio_clip, factor=speed_factor)
-
-                # Ensure the audio clip duration matches the desired duration
-                audio_clip = audio_clip.set_duration(desired_duration)
-
-                # Set the start time for the audio clip
-                audio_clip = audio_clip.set_start(subtitle.start.seconds + subtitle.start.milliseconds / 1000)
-                
-                audio_clips.append(audio_clip)
-                
-                # Remove the temporary audio file
-                os.remove(speech_file_path)
-            
-            # Combine all audio clips
-            final_audio = CompositeAudioClip(audio_clips)
-            final_audio.fps = 44100
-            
+            # Synthesized concurrently and decoded in memory, no per-line file
+            speeches = await asyncio.gather(*(synthesize_speech_async(subtitle.text, model="tts-1", voice="echo") for subtitle in translated_subtitles))
+
+            lines = []
+            for subtitle, speech in zip(translated_subtitles, speeches):
+                # Speed the line up or slow it down so it exactly fills the subtitle's time slot
+                start_time = subtitle.start.ordinal / 1000
+                desired_duration = subtitle.end.ordinal / 1000 - start_time
+                lines.append((stretch(speech.samples, int(round(desired_duration * AUDIO_FPS))), start_time))
+
+            # Mix every line into one track and encode it in a single pass
+            full_audio_duration = max((start + len(samples) / AUDIO_FPS for samples, start in lines), default=0)
+            audio_mix = AudioMix(full_audio_duration)
+            for samples, start in lines:
+                audio_mix.add(samples, start)
+
             # Export the full audio
             full_audio_path = os.path.join(speech_file_dir, 'full_generated_speech.mp3')
-            final_audio.write_audiofile(full_audio_path)
-            
+            audio_mix.write(full_audio_path)
+
             logging.info("Voice generated successfully for all subtitle lines.")
             return full_audio_path
         except Exception as e:
@@ -0,0 +1,99 @@
+import re
+import asyncio
+import logging
+
+import numpy as np
+
+from .tts_cache import tts_cache
+from .speech import Speech, PCM_RATE, synthesize_speech_async
+
+# Characters per TTS request; sentences are packed up to this so each chunk keeps its intonation
+DEFAULT_CHUNK_CHARS = 350
+# Silence between two sentences, as a single request would leave it
+SENTENCE_PAUSE = 0.4
+# Length of the sample-level crossfade at each join
+CROSSFADE = 0.01
+# Anything quieter than this (about -40 dBFS) counts as silence when trimming chunk edges
+SILENCE_THRESHOLD = 0.01
+
+_SENTENCE_END = re.compile(r'(?:(?<=[.!?…])|(?<=[.!?…]["\')\]]))\s+')
+
+
+def split_sentences(text: str, max_chars: int = DEFAULT_CHUNK_CHARS) -> list:
+    """Split text at sentence boundaries and pack consecutive sentences into chunks of at most max_chars.
+
+    A single sentence longer than max_chars becomes a chunk on its own.
+    """
+    chunks, current = [], ''
+    for sentence in _SENTENCE_END.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if current and len(current) + 1 + len(sentence) > max_chars:
+            chunks.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}" if current else sentence
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _speech_bounds(mono: np.ndarray) -> tuple:
+    """(first, last + 1) sample above the silence threshold, (0, 0) for a silent chunk."""
+    loud = np.flatnonzero(np.abs(mono) > SILENCE_THRESHOLD)
+    if not len(loud):
+        return 0, 0
+    return int(loud[0]), int(loud[-1]) + 1
+
+
+def stitch(pieces: list, pause: float = SENTENCE_PAUSE, crossfade: float = CROSSFADE) -> np.ndarray:
+    """Join mono PCM_RATE float32 pieces into one buffer.
+
+    Each join keeps at most pause / 2 of the silence after one piece and before the next,
+    which gives the sentence pause of a single request, and overlaps the two pieces by
+    `crossfade` with linear fades. The first piece keeps its leading silence and the last
+    its trailing silence.
+    """
+    edge = int(pause / 2 * PCM_RATE)
+    fade = int(crossfade * PCM_RATE)
+    trimmed = []
+    for index, mono in enumerate(pieces):
+        first, last = _speech_bounds(mono)
+        start = 0 if index == 0 else max(0, first - edge)
+        end = len(mono) if index == len(pieces) - 1 else min(len(mono), last + edge)
+        trimmed.append(mono[start:end])
+
+    # Joins overlap only when both neighbours are longer than the fade
+    overlaps = [fade if min(len(left), len(right)) >= fade else 0 for left, right in zip(trimmed, trimmed[1:])]
+    output = np.zeros(sum(len(piece) for piece in trimmed) - sum(overlaps), dtype=np.float32)
+    ramp = np.linspace(0, 1, fade, endpoint=False, dtype=np.float32)
+    offset = 0
+    for index, piece in enumerate(trimmed):
+        piece = piece.copy()
+        if index > 0 and overlaps[index - 1]:
+            offset -= fade
+            piece[:fade] *= ramp
+        if index < len(overlaps) and overlaps[index]:
+            piece[-fade:] *= 1 - ramp
+        output[offset:offset + len(piece)] += piece
+        offset += len(piece)
+    return output[:offset]
+
+
+async def synthesize_narration(text: str, model: str = "tts-1", voice: str = "echo", max_chars: int = DEFAULT_CHUNK_CHARS) -> Speech:
+    """Synthesize a long script as concurrent sentence-chunk requests, stitched into one Speech.
+
+    Latency follows the longest chunk instead of the whole script (the gateway's speech limit
+    caps how many run at once). Every chunk goes through the TTS cache, so an edited story
+    only re-synthesizes the chunks that changed.
+    """
+    texts = split_sentences(text, max_chars)
+    speeches = await asyncio.gather(*(synthesize_speech_async(chunk, model=model, voice=voice) for chunk in texts))
+
+    pieces = [np.frombuffer(speech.pcm, dtype='<i2', count=len(speech.pcm) // 2).astype(np.float32) / 32768 for speech in speeches]
+    mono = stitch(pieces)
+    pcm = (np.clip(mono, -1, 32767 / 32768) * 32768).round().astype('<i2').tobytes()
+    speech = Speech(pcm, source=f"tts:{tts_cache.make_key(text, model, voice, 'narration')}")
+    logging.info(f"Narration of {len(text)} characters synthesized in {len(texts)} chunks ({speech.duration:.2f}s)")
+    return speech
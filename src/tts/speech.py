@@ -0,0 +1,69 @@
+import os
+import wave
+
+import numpy as np
+
+from .tts_cache import tts_cache
+from ..llm.gateway import gateway
+from ..render.audio_mix import AUDIO_FPS, AUDIO_CHANNELS, MixedAudioClip
+
+# response_format="pcm" is raw 24 kHz, 16-bit signed little-endian mono
+PCM_RATE = 24000
+PCM_WIDTH = 2
+
+
+def pcm_to_samples(pcm: bytes, fps: int = AUDIO_FPS, nchannels: int = AUDIO_CHANNELS) -> np.ndarray:
+    """Raw TTS PCM as an (n, nchannels) float32 array at fps, resampled in numpy (no ffmpeg)."""
+    mono = np.frombuffer(pcm, dtype='<i2', count=len(pcm) // PCM_WIDTH).astype(np.float32) / 32768
+    if not len(mono):
+        return np.zeros((0, nchannels), dtype=np.float32)
+    step = PCM_RATE / fps  # source samples per output sample
+    positions = np.minimum(np.arange(int(round(len(mono) / step))) * step, len(mono) - 1)
+    samples = np.interp(positions, np.arange(len(mono)), mono).astype(np.float32)
+    return np.repeat(samples[:, None], nchannels, axis=1)
+
+
+class Speech:
+    """One synthesized voice line, held in memory.
+
+    pcm: the bytes returned by the TTS API (PCM_RATE Hz, 16-bit mono).
+    samples: (n, AUDIO_CHANNELS) float32 at AUDIO_FPS, ready for AudioMix.
+    source: stable name of the line ("tts:<cache key>"), used where a file path used to be.
+    """
+
+    __slots__ = ('pcm', 'samples', 'source')
+
+    def __init__(self, pcm: bytes, source: str = None, samples: np.ndarray = None):
+        self.pcm = pcm
+        self.samples = pcm_to_samples(pcm) if samples is None else samples
+        self.source = source
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / AUDIO_FPS
+
+    def to_clip(self) -> MixedAudioClip:
+        return MixedAudioClip(self.samples, fps=AUDIO_FPS)
+
+    def write_wav(self, output_path: str) -> str:
+        """Write the raw PCM behind a WAV header, for APIs that need a file (e.g. transcription)."""
+        os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+        with wave.open(output_path, 'wb') as wav_file:
+            wav_file.setnchannels(1)
+            wav_file.setsampwidth(PCM_WIDTH)
+            wav_file.setframerate(PCM_RATE)
+            wav_file.writeframes(self.pcm)
+        return output_path
+
+
+async def synthesize_speech_async(text: str, model: str = "tts-1", voice: str = "echo") -> Speech:
+    """TTS call returning the line in memory; only the cache (when enabled) touches disk.
+
+    Concurrent calls overlap through the gateway.
+    """
+    async def synthesize():
+        return await gateway.speech(model=model, voice=voice, input=text, response_format="pcm")
+
+    pcm = await tts_cache.fetch_bytes_async(text, synthesize, model=model, voice=voice, response_format="pcm")
+    return Speech(pcm, source=f"tts:{tts_cache.make_key(text, model, voice, 'pcm')}")
+
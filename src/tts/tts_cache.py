@@ -0,0 +1,147 @@
+import os
+import uuid
+import asyncio
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'assets', 'tts_cache')
+
+
+class TTSCache:
+    """Persistent, content-addressed cache of synthesized speech.
+
+    Entries are keyed by hash(text, model, voice, format) and evicted least-recently-used
+    once the directory grows past max_bytes. Concurrent requests for the same key share
+    a single synthesis.
+    """
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = 512 * 1024 * 1024, enabled: bool = True):
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._inflight = {}  # key -> Future resolved once the entry is in the cache
+
+    @staticmethod
+    def make_key(text: str, model: str, voice: str, response_format: str) -> str:
+        payload = '\x1f'.join([model, voice, response_format, text])
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def path_for(self, key: str, response_format: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], f"{key}.{response_format}")
+
+    def get(self, key: str, response_format: str):
+        """Return the cached file for key (marking it as recently used), None on a miss."""
+        path = self.path_for(key, response_format)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    async def fetch_bytes_async(self, text: str, synthesize, model: str = "tts-1", voice: str = "echo", response_format: str = "pcm") -> bytes:
+        """Return the speech for text as bytes, awaiting synthesize() (which returns them) only on a miss.
+
+        Concurrent misses for the same key share a single synthesis. With the cache disabled
+        nothing is written to disk.
+        """
+        if not self.enabled:
+            return await synthesize()
+
+        key = self.make_key(text, model, voice, response_format)
+        # The file system work (including eviction's walk of the cache) runs on worker threads
+        while True:
+            cached_path = await asyncio.to_thread(self.get, key, response_format)
+            if cached_path is not None:
+                logging.info(f"TTS cache hit: {key[:12]}")
+                break
+
+            with self._lock:
+                future = self._inflight.get(key)
+                is_owner = future is None
+                if is_owner:
+                    future = self._inflight[key] = Future()
+
+            if is_owner:
+                try:
+                    data = await synthesize()
+                    future.set_result(await asyncio.to_thread(self.store, key, response_format, data))
+                    return data
+                except asyncio.CancelledError:
+                    # Only the owner was cancelled: its waiters try again instead of failing too
+                    future.cancel()
+                    raise
+                except Exception as e:
+                    future.set_exception(e)
+                    raise
+                finally:
+                    with self._lock:
+                        self._inflight.pop(key, None)
+
+            # Someone else (on any thread or event loop) is already synthesizing this text.
+            # asyncio.wait leaves the shared future alone if this waiter is cancelled.
+            waiter = asyncio.wrap_future(future)
+            await asyncio.wait([waiter])
+            if not waiter.cancelled():
+                cached_path = waiter.result()
+                break
+
+        return await asyncio.to_thread(self._read, cached_path)
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def store(self, key: str, response_format: str, data: bytes) -> str:
+        """Add already synthesized bytes (e.g. a finished stream) to the cache."""
+        cached_path = self.path_for(key, response_format)
+        os.makedirs(os.path.dirname(cached_path), exist_ok=True)
+        partial_path = f"{cached_path}.{uuid.uuid4().hex}.part"
+        with open(partial_path, 'wb') as f:
+            f.write(data)
+        os.replace(partial_path, cached_path)
+        self.evict()
+        return cached_path
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits in max_bytes."""
+        entries = []
+        total_bytes = 0
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.part'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+                total_bytes += stat.st_size
+
+        entries.sort()
+        for _, size, path in entries:
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total_bytes -= size
+                logging.debug(f"Evicted TTS cache entry: {path}")
+            except FileNotFoundError:
+                continue
+
+
+# Shared instance used by every generate_voice implementation
+tts_cache = TTSCache(
+    cache_dir=os.getenv('TTS_CACHE_DIR') or None,
+    max_bytes=int(os.getenv('TTS_CACHE_MAX_MB') or 512) * 1024 * 1024,
+    enabled=(os.getenv('TTS_CACHE_ENABLED') or 'true').lower() != 'false',
+)
@@ -1,8 +1,8 @@
 import os
+import asyncio
 import logging
 import requests
-from moviepy.editor import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip, ImageClip
-from openai import OpenAI
+from moviepy.editor import VideoFileClip, AudioFileClip, TextClip, CompositeVideoClip
 import pysrt
 from yt_dlp import YoutubeDL
 from pathlib import Path
@@ -12,17 +12,27 @@ import json  # Added import for JSON operations
 
 from dotenv import load_dotenv
 
+from .llm.gateway import gateway
+from .llm.storyboard import STORYBOARD_PROMPT, StoryboardParser, parse_storyboard
+from .tts.speech import synthesize_speech_async
+from .tts.narration import split_sentences, synthesize_narration
+from .render.compositor import IndexedCompositeVideoClip
+from .render.image_ingest import sprite_clip
+from .render.video_source import DecodedVideoClip, center_crop, displayed_size, video_infos
+from .render.transforms import fit_even
+from .render.pipeline import write_video
+
 # Load environment variables from .env file
 load_dotenv()
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 
-openai_api_key = os.getenv('OPENAI_API_KEY')
+# Shorts are rendered at 30 fps whatever the background's frame rate
+OUTPUT_FPS = 30
 
 class VideoEditor:
     def __init__(self):
-        self.openai = OpenAI(api_key=openai_api_key)
         self.base_dir = os.path.dirname(os.path.abspath(__file__))
 
     def download_video(self, youtube_url):
@@ -52,28 +62,11 @@ class VideoEditor:
             logging.error(f"Error downloading video: {e}")
             return None
 
-    def cut_video(self, video_path, start_time, end_time):
-        if not os.path.exists(video_path):
-            logging.error(f"Video file does not exist, {video_path}")
-            return
-        try:
-            unique_id = uuid.uuid4()
-            assets_dir = os.path.join(self.base_dir, '..', 'assets')
-            os.makedirs(assets_dir, exist_ok=True)
-            output_path = os.path.join(assets_dir, f"cut_video_{unique_id}.mp4")
-            
-            clip = VideoFileClip(video_path)
-            cut_clip = clip.subclip(start_time, end_time)
-            cut_clip.write_videofile(output_path)
-            logging.info("Video cut successfully.")
-            return output_path
-        except Exception as e:
-            logging.error(f"Error cutting video: {e}")
-
     # Create antoher class to handle ai generation
     async def generate_script(self, topic, prompt_template):
         try:
-            completion = self.openai.chat.completions.create(  # Async call to create chat completion
+            completion = await gateway.chat(
+                cache=False,  # a new script every time
                 model="gpt-3.5-turbo-0125",
                 max_tokens=400,
                 response_format={ "type": "json_object" },
@@ -99,7 +92,7 @@ class VideoEditor:
 
     async def gpt_summary_of_script(self, video_script: str) -> str:
         try:
-            completion = self.openai.chat.completions.create(
+            completion = await gateway.chat(
                 model="gpt-3.5-turbo-0125",
                 temperature=0.25,
                 max_tokens=250,
@@ -115,7 +108,7 @@ class VideoEditor:
     
     async def gpt_image_prompt_from_scene(self, scene, script_summary):
         try:
-            completion = self.openai.chat.completions.create( 
+            completion = await gateway.chat(
                 model="gpt-3.5-turbo",  # Updated model name
                 temperature=0.25,
                 messages = [
@@ -147,7 +140,8 @@ class VideoEditor:
                         'content': f'Scene script: "{scene}"\nScript summary: {script_summary}'
                     }
                 ],
-                max_tokens=200
+                max_tokens=200,
+                validate=lambda content: json.loads(content)["image_prompt"],
             )
             response_json = json.loads(completion.choices[0].message.content)
             return response_json["image_prompt"]
@@ -181,7 +175,7 @@ class VideoEditor:
             }
         """
         try:
-            completion = self.openai.chat.completions.create(
+            completion = await gateway.chat(
                 model="gpt-3.5-turbo",
                 temperature=0.25,
                 response_format={ "type": "json_object" },
@@ -189,32 +183,119 @@ class VideoEditor:
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": f"Script: {script}"}
-                ]
+                ],
+                validate=lambda content: json.loads(content)["scenes"],
             )
             response_json = json.loads(completion.choices[0].message.content)
             return response_json["scenes"]
         except Exception as e:
             logging.error(f"Error creating scenes from script: {e}")
             return script
+
+    async def create_storyboard(self, script):
+        """Scenes, summary and every scene's image prompt in a single chat call.
+
+        Returns (scenes, script_summary, image_prompts). Only what fails validation is asked
+        for again: a missing summary or image prompt with the dedicated calls (concurrently),
+        and an unusable scene list with the separate scenes + summary path.
+        """
+        try:
+            completion = await gateway.chat(
+                model="gpt-3.5-turbo",
+                temperature=0.25,
+                response_format={ "type": "json_object" },
+                max_tokens=3000,
+                messages=[
+                    {"role": "system", "content": STORYBOARD_PROMPT},
+                    {"role": "user", "content": f"Script: {script}"}
+                ],
+                validate=parse_storyboard,
+            )
+            script_summary, scenes, image_prompts = parse_storyboard(completion.choices[0].message.content)
+        except Exception as e:
+            logging.error(f"Error creating storyboard, falling back to separate calls: {e}")
+            scenes, script_summary = await asyncio.gather(
+                self.create_scenes_from_script(script),
+                self.gpt_summary_of_script(script)
+            )
+            if isinstance(scenes, str):
+                scenes = [scenes]  # create_scenes_from_script falls back to the whole script
+            image_prompts = [None] * len(scenes)
+
+        if script_summary is None:
+            script_summary = await self.gpt_summary_of_script(script)
+        missing = [index for index, image_prompt in enumerate(image_prompts) if image_prompt is None]
+        if missing:
+            logging.info(f"Storyboard: generating {len(missing)} of {len(scenes)} image prompts separately")
+            retried = await asyncio.gather(*(self.gpt_image_prompt_from_scene(scenes[index], script_summary) for index in missing))
+            for index, image_prompt in zip(missing, retried):
+                image_prompts[index] = image_prompt
+        return scenes, script_summary, image_prompts
+
+    async def stream_storyboard(self, script):
+        """create_storyboard as a stream: yields (scene, image_prompt, script_summary) per scene.
+
+        Every scene comes out as soon as its JSON element is complete, while the model is still
+        writing the next ones. image_prompt is None when the model left it out, and
+        script_summary is None until the summary has arrived. If the stream breaks before the
+        first scene, the whole storyboard is made with create_storyboard instead.
+        """
+        parser = StoryboardParser()
+        yielded = 0
+        try:
+            async for content in gateway.stream_chat(
+                model="gpt-3.5-turbo",
+                temperature=0.25,
+                response_format={ "type": "json_object" },
+                max_tokens=3000,
+                messages=[
+                    {"role": "system", "content": STORYBOARD_PROMPT},
+                    {"role": "user", "content": f"Script: {script}"}
+                ],
+                validate=parse_storyboard,
+            ):
+                for scene, image_prompt in parser.feed(content):
+                    yielded += 1
+                    yield scene, image_prompt, parser.summary
+        except Exception as e:
+            if yielded:
+                raise
+            logging.error(f"Error streaming storyboard: {e}")
+
+        if not yielded:
+            scenes, script_summary, image_prompts = await self.create_storyboard(script)
+            for scene, image_prompt in zip(scenes, image_prompts):
+                yield scene, image_prompt, script_summary
+
     # Create antoher class to handle ai generation
     async def generate_voice(self, script):
+        """Synthesize script into an in-memory Speech (None on failure)."""
         try:
-            unique_id = uuid.uuid4()
-            assets_dir = os.path.join(self.base_dir, '..', 'assets')
-            os.makedirs(assets_dir, exist_ok=True)
-            speech_file_path = os.path.join(assets_dir, f"voice_{unique_id}.mp3")
-            
-            response = self.openai.audio.speech.create(
-                model="tts-1",
-                voice="echo",
-                input=script
-            )
-            response.stream_to_file(speech_file_path)
+            speech = await synthesize_speech_async(script, model="tts-1", voice="echo")
             logging.info("Voice generated successfully.")
-            return speech_file_path
+            return speech
         except Exception as e:
             logging.error(f"Error generating voice: {e}")
 
+    async def generate_narration(self, script):
+        """Synthesize a long script as concurrent sentence chunks stitched into one Speech (None on failure).
+
+        A script that fits in a single chunk is one generate_voice call.
+        """
+        if len(split_sentences(script)) <= 1:
+            return await self.generate_voice(script)
+        try:
+            speech = await synthesize_narration(script, model="tts-1", voice="echo")
+            logging.info("Narration generated successfully.")
+            return speech
+        except Exception as e:
+            logging.error(f"Error generating narration: {e}")
+
+    def save_voice(self, speech) -> str:
+        """Write a Speech to a WAV file in assets, for consumers that need a file (transcription)."""
+        assets_dir = os.path.join(self.base_dir, '..', 'assets')
+        return speech.write_wav(os.path.join(assets_dir, f"voice_{uuid.uuid4()}.wav"))
+
     def load_subtitles(self, subtitles_path):
         try:
             return pysrt.open(subtitles_path)  # Return the loaded SRT file with start and end times
@@ -234,6 +315,15 @@ class VideoEditor:
             logging.error(f"Error adding audio to video: {e}")
             return None
     
+    def open_background_9_16(self, video_path: str, fps: int = OUTPUT_FPS) -> VideoFileClip:
+        """Open a background video with the 9:16 center crop and the fps cap done by ffmpeg while decoding.
+
+        The crop is rounded to an even size, so the final render needs no resize for the encoder.
+        The clip is silent (the narration replaces its audio) and crop_video_9_16 leaves it as is.
+        """
+        source_size = displayed_size(video_infos(video_path))
+        return DecodedVideoClip(video_path, crop=center_crop(source_size, 9 / 16, even=True), fps=fps, audio=False)
+
     def crop_video_9_16(self, video_clip: VideoFileClip) -> VideoFileClip:
         try:
             # Crop the video to TikTok format (9:16 aspect ratio)
@@ -266,7 +356,7 @@ class VideoEditor:
                 subtitles_clips = [subtitles_clips] if subtitles_clips else []
 
             # Combine the video and subtitle clips
-            final_clip = CompositeVideoClip([video_clip] + subtitles_clips)
+            final_clip = IndexedCompositeVideoClip([video_clip] + subtitles_clips)
             logging.info("Captions added to video successfully.")
             return final_clip
         except Exception as e:
@@ -282,8 +372,9 @@ class VideoEditor:
         for i, image_path in enumerate(images):
             if image_path is not None:
                 try:
-                    image_clip = ImageClip(image_path).set_duration(image_duration)
-                    image_clip = image_clip.set_position(('center', 70)).resize(height=video_clip.h / 3)
+                    # Decoded straight to a third of the video height
+                    image_clip = sprite_clip(image_path, height=video_clip.h / 3).set_duration(image_duration)
+                    image_clip = image_clip.set_position(('center', 70))
                     
                     # Calculate start time for each image
                     start_time = i * image_duration
@@ -297,7 +388,7 @@ class VideoEditor:
                     logging.error(f"Error processing image_path: {image_path}, {e}")
             # If image_path is None, we simply don't add an image for this interval
         
-        return CompositeVideoClip(clips)
+        return IndexedCompositeVideoClip(clips)
 
     def render_final_video(self, final_clip) -> str:
         """Render the final video with all components added."""
@@ -306,16 +397,12 @@ class VideoEditor:
         os.makedirs(result_dir, exist_ok=True)
         output_path = os.path.join(result_dir, f"final_video_{unique_id}.mp4")
         
-        # Ensure even dimensions
-        width, height = final_clip.w, final_clip.h
-        if width % 2 != 0:
-            width -= 1
-        if height % 2 != 0:
-            height -= 1
-        
-        final_clip = final_clip.resize(newsize=(width, height))
+        # Ensure even dimensions (the background is already planned even, so this is normally a no-op)
+        final_clip = fit_even(final_clip)
         
-        final_clip.write_videofile(
+        # Composition, video encoding and audio encoding run concurrently
+        write_video(
+            final_clip,
             output_path,
             codec='libx264',
             preset='veryfast',